@@ -6,22 +6,39 @@ Reference: https://fastapi.tiangolo.com/tutorial/dependencies/
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Annotated
+from typing import Annotated, Optional
 
 from app.shared.database import get_session
 from app.auth.service import auth_service
-from app.auth.models import User
+from app.auth.models import UserPrincipal
 
 # OAuth2 scheme for token extraction
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/token")
 
 
+async def get_token_principal(
+    session: AsyncSession, token: str
+) -> Optional[UserPrincipal]:
+    """
+    Resolve a bearer token to the principal of the user it names.
+    
+    Returns None for an invalid or expired token, or one naming no user;
+    the caller decides what to do with inactive users.
+    
+    Single Responsibility: Token to principal resolution
+    """
+    token_data = auth_service.verify_token(token)
+    if token_data is None or token_data.username is None:
+        return None
+    return await auth_service.get_auth_projection(session, token_data.username)
+
+
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     session: Annotated[AsyncSession, Depends(get_session)]
-) -> User:
+) -> UserPrincipal:
     """
-    FastAPI dependency to get current authenticated user.
+    FastAPI dependency to get current authenticated, active user.
     
     Single Responsibility: Current user retrieval from token
     """
@@ -31,25 +48,12 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token_data = auth_service.verify_token(token)
-    if token_data is None or token_data.username is None:
-        raise credentials_exception
-    
-    user = await auth_service.get_user_by_username(session, token_data.username)
+    user = await get_token_principal(session, token)
     if user is None:
         raise credentials_exception
     
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    
     return user
 
-
-async def get_current_active_user(
-    current_user: Annotated[User, Depends(get_current_user)]
-) -> User:
-    """
-    FastAPI dependency to get current active user.
-    
-    Single Responsibility: Active user validation
-    """
-    if not current_user.is_active:
-        raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
@@ -3,11 +3,39 @@ Database models using SQLModel for type safety and async support
 Reference: https://sqlmodel.tiangolo.com/
 """
 
+from sqlalchemy import Column, DateTime, ForeignKey, Index, func
 from sqlmodel import SQLModel, Field, Relationship
-from typing import Optional, List
+from typing import NamedTuple, Optional, List
 from datetime import datetime
 import uuid
 
+from app.shared.types import UUIDType, uuid7
+
+
+def _id_column() -> Column:
+    """Primary key column holding a 16-byte UUID."""
+    return Column(UUIDType(), primary_key=True)
+
+
+def _foreign_key_column(target: str) -> Column:
+    """Foreign key column referencing a UUID primary key."""
+    return Column(UUIDType(), ForeignKey(target), nullable=False)
+
+
+def _created_at_column() -> Column:
+    """Timestamp column filled in by the database on insert."""
+    return Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+def _updated_at_column() -> Column:
+    """Timestamp column filled in by the database on insert and update."""
+    return Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
 
 class User(SQLModel, table=True):
     """
@@ -16,20 +44,33 @@ class User(SQLModel, table=True):
     Single Responsibility: User data representation and database mapping
     """
     
-    id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True)
+    id: Optional[uuid.UUID] = Field(default_factory=uuid7, sa_column=_id_column())
     username: str = Field(index=True, unique=True, min_length=3, max_length=50)
     email: str = Field(index=True, unique=True)
     full_name: str = Field(max_length=100)
     hashed_password: str
     is_active: bool = Field(default=True)
     is_superuser: bool = Field(default=False)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: Optional[datetime] = Field(default=None, sa_column=_created_at_column())
     
     # Relationships
     chat_sessions: List["ChatSession"] = Relationship(back_populates="user")
     documents: List["Document"] = Relationship(back_populates="owner")
 
 
+class UserPrincipal(NamedTuple):
+    """
+    Lightweight projection of the ``User`` columns needed to authorize a request.
+    
+    Single Responsibility: Authenticated identity representation
+    """
+    
+    id: uuid.UUID
+    username: str
+    is_active: bool
+    is_superuser: bool
+
+
 class ChatSession(SQLModel, table=True):
     """
     Chat session model for organizing conversations.
@@ -37,13 +78,18 @@ class ChatSession(SQLModel, table=True):
     Single Responsibility: Chat session data representation
     """
     
-    id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True)
+    # Matches the session listing: WHERE user_id = ? ORDER BY updated_at DESC
+    __table_args__ = (
+        Index("ix_chatsession_user_updated", "user_id", "updated_at"),
+    )
+    
+    id: Optional[uuid.UUID] = Field(default_factory=uuid7, sa_column=_id_column())
     title: str = Field(max_length=200)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: Optional[datetime] = Field(default=None, sa_column=_created_at_column())
+    updated_at: Optional[datetime] = Field(default=None, sa_column=_updated_at_column())
     
     # Foreign key
-    user_id: uuid.UUID = Field(foreign_key="user.id")
+    user_id: uuid.UUID = Field(sa_column=_foreign_key_column("user.id"))
     
     # Relationships
     user: User = Relationship(back_populates="chat_sessions")
@@ -57,13 +103,18 @@ class ChatMessage(SQLModel, table=True):
     Single Responsibility: Message data representation
     """
     
-    id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True)
+    # Matches the history query: WHERE session_id = ? ORDER BY created_at
+    __table_args__ = (
+        Index("ix_chatmessage_session_created", "session_id", "created_at"),
+    )
+    
+    id: Optional[uuid.UUID] = Field(default_factory=uuid7, sa_column=_id_column())
     content: str
     is_user: bool = Field(default=True)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: Optional[datetime] = Field(default=None, sa_column=_created_at_column())
     
     # Foreign key
-    session_id: uuid.UUID = Field(foreign_key="chatsession.id")
+    session_id: uuid.UUID = Field(sa_column=_foreign_key_column("chatsession.id"))
     
     # Relationships
     session: ChatSession = Relationship(back_populates="messages")
@@ -76,15 +127,15 @@ class Document(SQLModel, table=True):
     Single Responsibility: Document metadata representation
     """
     
-    id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True)
+    id: Optional[uuid.UUID] = Field(default_factory=uuid7, sa_column=_id_column())
     filename: str
     content_type: str
     file_size: int
     processed: bool = Field(default=False)
-    uploaded_at: datetime = Field(default_factory=datetime.utcnow)
+    uploaded_at: Optional[datetime] = Field(default=None, sa_column=_created_at_column())
     
     # Foreign key
-    owner_id: uuid.UUID = Field(foreign_key="user.id")
+    owner_id: uuid.UUID = Field(sa_column=_foreign_key_column("user.id"))
     
     # Relationships
     owner: User = Relationship(back_populates="documents")
@@ -12,14 +12,26 @@ from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.shared.database import get_session
+from app.shared.templates import get_templates
 from app.auth.service import auth_service
 from app.auth.schemas import UserCreate, UserResponse, Token
-from app.auth.dependencies import get_current_active_user
-from app.auth.models import User
+from app.auth.dependencies import get_current_user
+from app.auth.models import User, UserPrincipal
 from app.shared.config import settings
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
+
+
+def _to_user_response(user: User) -> UserResponse:
+    """Build a UserResponse from a database row without re-validating it."""
+    return UserResponse.model_construct(
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        full_name=user.full_name,
+        is_active=user.is_active,
+        created_at=user.created_at,
+    )
 
 
 @router.post("/token", response_model=Token)
@@ -71,23 +83,30 @@ async def register_user(
         )
     
     user = await auth_service.create_user(session, user_create)
-    return UserResponse.model_validate(user)
+    return _to_user_response(user)
 
 
 @router.get("/me", response_model=UserResponse)
 async def read_users_me(
-    current_user: Annotated[User, Depends(get_current_active_user)]
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_session)]
 ):
     """
     Get current user information.
     
     Single Responsibility: Current user data retrieval
     """
-    return UserResponse.model_validate(current_user)
+    user = await session.get(User, current_user.id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return _to_user_response(user)
 
 
 @router.get("/login", response_class=HTMLResponse)
-async def login_page(request: Request):
+async def login_page(
+    request: Request,
+    templates: Annotated[Jinja2Templates, Depends(get_templates)]
+):
     """
     Serve login page.
     
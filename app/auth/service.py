@@ -3,17 +3,50 @@ Authentication business logic using JWT tokens
 Reference: https://fastapi.tiangolo.com/tutorial/security/oauth2-jwt/
 """
 
+import asyncio
+import hashlib
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Callable, Optional, Tuple
+import bcrypt
 import jwt
-from passlib.context import CryptContext
+from cachetools import TTLCache
 from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth.models import User
+from app.auth.models import User, UserPrincipal
 from app.auth.schemas import UserCreate, TokenData
 from app.shared.config import settings
 
+# Dedicated pool for password hashing. bcrypt releases the GIL while hashing,
+# so sizing the pool to the CPU count lets concurrent logins run in parallel
+# without starving the default executor used by the rest of the app.
+_password_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash",
+)
+
+# bcrypt only uses the first 72 bytes of a password; truncate explicitly so
+# long passwords keep verifying the way they did under passlib.
+_BCRYPT_MAX_PASSWORD_BYTES = 72
+
+
+def _encode_password(password: str) -> bytes:
+    """Encode a password for bcrypt, truncated to its input limit."""
+    return password.encode("utf-8")[:_BCRYPT_MAX_PASSWORD_BYTES]
+
+
+# Cached tokens stop being served this many seconds before their own expiry
+_TOKEN_CACHE_EXPIRY_MARGIN = 5
+
+# JWT signing parameters, bound once instead of rebuilt on every decode
+_SECRET_KEY = settings.secret_key
+_ALGORITHM = settings.algorithm
+_ALGORITHMS = [settings.algorithm]
+_DECODE_OPTIONS = {"require": ["exp", "sub"]}
+
 
 class AuthService:
     """
@@ -23,7 +56,21 @@ class AuthService:
     """
     
     def __init__(self):
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        # sha256(token) -> (TokenData, exp). Keyed on the digest so raw tokens
+        # are never held in memory beyond the request that presented them.
+        self._token_cache: TTLCache[bytes, Tuple[TokenData, float]] = TTLCache(
+            maxsize=10000, ttl=300
+        )
+        # Short-lived username -> UserPrincipal cache for the per-request auth
+        # lookup. Principals are immutable tuples, so sharing them across
+        # requests is safe, unlike session-bound ORM instances.
+        self._principal_cache: TTLCache[str, UserPrincipal] = TTLCache(
+            maxsize=1024, ttl=10
+        )
+        # Hash checked when the username is unknown, so a failed login costs
+        # one bcrypt verification whether or not the user exists. Created on
+        # first use so importing this module does not pay for a bcrypt hash.
+        self._dummy_hash: Optional[str] = None
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """
@@ -31,7 +78,23 @@ class AuthService:
         
         Single Responsibility: Password verification
         """
-        return self.pwd_context.verify(plain_password, hashed_password)
+        try:
+            return bcrypt.checkpw(
+                _encode_password(plain_password), hashed_password.encode()
+            )
+        except ValueError:
+            # Malformed or non-bcrypt hash
+            return False
+    
+    def _verify_dummy_password(self, password: str) -> bool:
+        """
+        Spend one bcrypt verification for a login with an unknown username.
+        
+        Single Responsibility: Login timing equalization
+        """
+        if self._dummy_hash is None:
+            self._dummy_hash = self.get_password_hash(secrets.token_urlsafe(16))
+        return self.verify_password(password, self._dummy_hash)
     
     def get_password_hash(self, password: str) -> str:
         """
@@ -39,7 +102,16 @@ class AuthService:
         
         Single Responsibility: Password hashing
         """
-        return self.pwd_context.hash(password)
+        return bcrypt.hashpw(_encode_password(password), bcrypt.gensalt()).decode()
+    
+    async def _run_in_hash_pool(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a CPU-bound hashing call off the event loop.
+        
+        Single Responsibility: Password hashing offload
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_hash_executor, func, *args)
     
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None):
         """
@@ -56,7 +128,7 @@ class AuthService:
             )
         
         to_encode.update({"exp": expire})
-        return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+        return jwt.encode(to_encode, _SECRET_KEY, algorithm=_ALGORITHM)
     
     def verify_token(self, token: str) -> Optional[TokenData]:
         """
@@ -64,14 +136,20 @@ class AuthService:
         
         Single Responsibility: Token verification
         """
+        cache_key = hashlib.sha256(token.encode()).digest()
+        cached = self._token_cache.get(cache_key)
+        if cached is not None:
+            token_data, expires_at = cached
+            if time.time() < expires_at - _TOKEN_CACHE_EXPIRY_MARGIN:
+                return token_data
+        
         try:
             payload = jwt.decode(
-                token, settings.secret_key, algorithms=[settings.algorithm]
+                token, _SECRET_KEY, algorithms=_ALGORITHMS, options=_DECODE_OPTIONS
             )
-            username: str = payload.get("sub")
-            if username is None:
-                return None
-            return TokenData(username=username)
+            token_data = TokenData(username=payload["sub"])
+            self._token_cache[cache_key] = (token_data, float(payload["exp"]))
+            return token_data
         except jwt.PyJWTError:
             return None
     
@@ -87,6 +165,38 @@ class AuthService:
         result = await session.execute(statement)
         return result.scalar_one_or_none()
     
+    async def get_auth_projection(
+        self, session: AsyncSession, username: str
+    ) -> Optional[UserPrincipal]:
+        """
+        Retrieve only the authorization columns of a user.
+        
+        Single Responsibility: Per-request identity lookup
+        """
+        principal = self._principal_cache.get(username)
+        if principal is not None:
+            return principal
+        
+        statement = select(
+            User.id, User.username, User.is_active, User.is_superuser
+        ).where(User.username == username)
+        result = await session.execute(statement)
+        row = result.one_or_none()
+        if row is None:
+            return None
+        
+        principal = UserPrincipal._make(row)
+        self._principal_cache[username] = principal
+        return principal
+    
+    def invalidate_user(self, username: str) -> None:
+        """
+        Drop a cached principal so the next lookup hits the database.
+        
+        Single Responsibility: User cache invalidation
+        """
+        self._principal_cache.pop(username, None)
+    
     async def authenticate_user(
         self, session: AsyncSession, username: str, password: str
     ) -> Optional[User]:
@@ -96,7 +206,12 @@ class AuthService:
         Single Responsibility: User authentication
         """
         user = await self.get_user_by_username(session, username)
-        if not user or not self.verify_password(password, user.hashed_password):
+        if not user:
+            await self._run_in_hash_pool(self._verify_dummy_password, password)
+            return None
+        if not await self._run_in_hash_pool(
+            self.verify_password, password, user.hashed_password
+        ):
             return None
         return user
     
@@ -106,7 +221,9 @@ class AuthService:
         
         Single Responsibility: User creation
         """
-        hashed_password = self.get_password_hash(user_create.password)
+        hashed_password = await self._run_in_hash_pool(
+            self.get_password_hash, user_create.password
+        )
         user = User(
             username=user_create.username,
             email=user_create.email,
@@ -116,6 +233,7 @@ class AuthService:
         session.add(user)
         await session.commit()
         await session.refresh(user)
+        self.invalidate_user(user.username)
         return user
 
 
@@ -4,9 +4,10 @@ Reference: https://github.com/ollama/ollama/blob/main/docs/api.md
 """
 
 import httpx
-import json
-from typing import Optional, AsyncGenerator, Dict, Any
+import orjson
+from typing import Optional, AsyncGenerator, Dict, Any, List
 from fastapi import HTTPException
+from fastapi.requests import HTTPConnection
 
 from app.shared.config import settings
 
@@ -20,14 +21,54 @@ class OllamaService:
     
     def __init__(self, base_url: str = None):
         self.base_url = base_url or settings.ollama_url
-        self.client = httpx.AsyncClient(timeout=60.0)
         self.default_model = settings.default_model
+        self._client: Optional[httpx.AsyncClient] = None
     
     async def __aenter__(self):
+        await self.connect()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.client.aclose()
+        await self.disconnect()
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client, created on first use if not connected yet."""
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+    
+    def _create_client(self) -> httpx.AsyncClient:
+        """
+        Build the pooled HTTP client used for all Ollama calls.
+        
+        Single Responsibility: HTTP client configuration
+        """
+        # Pool limits and HTTP/2 live on the transport when one is supplied
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=1,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=50,
+                keepalive_expiry=60,
+            ),
+        )
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(60.0, connect=5.0),
+        )
+    
+    async def connect(self):
+        """Create the HTTP client inside the running event loop."""
+        if self._client is None:
+            self._client = self._create_client()
+    
+    async def disconnect(self):
+        """Close the HTTP client and its pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     async def check_health(self) -> bool:
         """
@@ -50,24 +91,24 @@ class OllamaService:
         try:
             response = await self.client.get(f"{self.base_url}/api/tags")
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             return [model["name"] for model in data.get("models", [])]
         except Exception as e:
             print(f"Error listing models: {e}")
             return []
     
-    async def generate_response(
-        self, 
-        prompt: str, 
+    def _build_payload(
+        self,
+        prompt: str,
         model: str = None,
         context: Optional[str] = None,
         stream: bool = False,
         **kwargs
-    ) -> str:
+    ) -> Dict[str, Any]:
         """
-        Generate response from LLM.
+        Build the Ollama generate request body.
         
-        Single Responsibility: Response generation
+        Single Responsibility: Request payload construction
         """
         model = model or self.default_model
         
@@ -83,7 +124,7 @@ Answer:"""
         else:
             full_prompt = prompt
         
-        payload = {
+        return {
             "model": model,
             "prompt": full_prompt,
             "stream": stream,
@@ -94,6 +135,21 @@ Answer:"""
                 "stop": kwargs.get("stop", [])
             }
         }
+    
+    async def generate_response(
+        self, 
+        prompt: str, 
+        model: str = None,
+        context: Optional[str] = None,
+        stream: bool = False,
+        **kwargs
+    ) -> str:
+        """
+        Generate response from LLM.
+        
+        Single Responsibility: Response generation
+        """
+        payload = self._build_payload(prompt, model, context, stream, **kwargs)
         
         try:
             if stream:
@@ -104,7 +160,7 @@ Answer:"""
                     json=payload
                 )
                 response.raise_for_status()
-                result = response.json()
+                result = orjson.loads(response.content)
                 return result.get("response", "")
                 
         except httpx.HTTPError as e:
@@ -118,6 +174,36 @@ Answer:"""
                 detail=f"Unexpected error: {str(e)}"
             )
     
+    def stream_generate(
+        self,
+        prompt: str,
+        model: str = None,
+        context: Optional[str] = None,
+        **kwargs
+    ) -> AsyncGenerator[str, None]:
+        """
+        Stream response tokens from LLM as they are generated.
+        
+        Single Responsibility: Streaming response generation
+        """
+        payload = self._build_payload(prompt, model, context, stream=True, **kwargs)
+        return self._stream_generate(payload)
+    
+    @staticmethod
+    def _parse_stream_line(line: bytes) -> Optional[str]:
+        """
+        Extract the response text from one NDJSON record.
+        
+        Single Responsibility: Stream record decoding
+        """
+        if not line.strip():
+            return None
+        try:
+            data = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            return None
+        return data.get("response") or None
+    
     async def _stream_generate(self, payload: Dict[str, Any]) -> AsyncGenerator[str, None]:
         """
         Stream response from LLM.
@@ -131,14 +217,21 @@ Answer:"""
                 json=payload
             ) as response:
                 response.raise_for_status()
-                async for line in response.aiter_lines():
-                    if line:
-                        try:
-                            data = json.loads(line)
-                            if "response" in data and data["response"]:
-                                yield data["response"]
-                        except json.JSONDecodeError:
-                            continue
+                buffer = bytearray()
+                async for chunk in response.aiter_bytes():
+                    buffer += chunk
+                    start = 0
+                    while (end := buffer.find(b"\n", start)) != -1:
+                        line = buffer[start:end]
+                        start = end + 1
+                        text = self._parse_stream_line(line)
+                        if text:
+                            yield text
+                    del buffer[:start]
+                # Ollama terminates every record with a newline; flush any remainder
+                text = self._parse_stream_line(buffer)
+                if text:
+                    yield text
         except Exception as e:
             raise HTTPException(
                 status_code=500, 
@@ -148,3 +241,12 @@ Answer:"""
 
 # Global LLM service instance
 llm_service = OllamaService()
+
+
+def get_llm_service(connection: HTTPConnection) -> OllamaService:
+    """
+    Dependency returning the LLM service attached to the app at startup.
+    
+    Single Responsibility: Provide LLM service to endpoints
+    """
+    return connection.app.state.llm
@@ -0,0 +1,176 @@
+"""
+Background persistence of chat messages
+Reference: https://docs.sqlalchemy.org/en/20/orm/queryguide/dml.html#orm-bulk-insert-statements
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from app.auth.models import ChatMessage
+from app.shared.config import settings
+from app.shared.database import sessionmanager
+from app.shared.monitoring import app_logger
+from app.shared.types import uuid7
+
+# Queue marker telling the consumer to finish after the rows ahead of it
+_STOP = object()
+
+
+class MessageWriter:
+    """
+    Queues chat messages and writes them to the database in batches.
+
+    Callers enqueue rows without waiting on the database; a single consumer
+    task flushes them every ``flush_interval`` seconds or ``batch_size`` rows,
+    whichever comes first.
+
+    Single Responsibility: Off-path chat message persistence
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 100,
+        flush_interval: float = 0.02,
+        max_attempts: int = 5,
+        retry_backoff: float = 0.5,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the consumer task."""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Write any queued messages and stop the consumer task."""
+        if self._task is None:
+            return
+        self._queue.put_nowait(_STOP)
+        await self._task
+        self._task = None
+        self._queue = None
+
+    def enqueue(self, session_id: uuid.UUID, content: str, is_user: bool):
+        """
+        Queue a chat message for insertion.
+
+        The id and timestamp are assigned here, so messages keep the order
+        they were sent in even when written in the same batch.
+        """
+        if self._queue is None:
+            return
+        self._queue.put_nowait({
+            "id": uuid7(),
+            "session_id": session_id,
+            "content": content,
+            "is_user": is_user,
+            "created_at": datetime.now(timezone.utc),
+        })
+
+    async def _run(self):
+        """
+        Collect rows into batches and write them.
+
+        Single Responsibility: Batch collection
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            row = await self._queue.get()
+            if row is _STOP:
+                return
+            rows = [row]
+            deadline = loop.time() + self.flush_interval
+            stopping = False
+            while len(rows) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout)
+                except TimeoutError:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                rows.append(row)
+            await self._write(rows)
+            if stopping:
+                return
+
+    async def _write(self, rows: List[Dict[str, Any]]):
+        """
+        Insert a batch of rows in one executemany round-trip.
+
+        A batch rejected by a constraint (e.g. a message for a deleted chat
+        session) is split and inserted row by row, so only the offending
+        rows are dropped instead of every message in the batch.
+
+        Single Responsibility: Batch insertion
+        """
+        try:
+            await self._insert(rows)
+        except IntegrityError:
+            for row in rows:
+                try:
+                    await self._insert([row])
+                except IntegrityError as e:
+                    self._report_failure(1, 1, e, dropped=True)
+
+    async def _insert(self, rows: List[Dict[str, Any]]):
+        """
+        Insert rows, retrying transient failures with exponential backoff.
+
+        Connection loss, timeouts and other errors are retried up to
+        ``max_attempts`` tries before the rows are dropped. Rows carry their
+        own ids and the insert is one transaction, so a retry cannot
+        duplicate messages. Later batches wait in the queue meanwhile.
+        IntegrityError is raised at once, since retrying cannot fix it.
+
+        Single Responsibility: Retried insertion
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                async with sessionmanager.session() as session:
+                    await session.execute(insert(ChatMessage), rows)
+                    await session.commit()
+                return
+            except IntegrityError:
+                raise
+            except Exception as e:
+                dropped = attempt == self.max_attempts
+                self._report_failure(len(rows), attempt, e, dropped)
+                if not dropped:
+                    await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+    def _report_failure(
+        self, rows: int, attempt: int, error: Exception, dropped: bool
+    ):
+        """Report a failed insert through the application logger."""
+        app_logger.log_persistence_failure(
+            table=ChatMessage.__tablename__,
+            rows=rows,
+            attempt=attempt,
+            max_attempts=self.max_attempts,
+            error=str(error),
+            dropped=dropped,
+        )
+
+
+# Global message writer instance
+message_writer = MessageWriter(
+    batch_size=settings.message_write_batch_size,
+    flush_interval=settings.message_write_interval,
+    max_attempts=settings.message_write_max_attempts,
+    retry_backoff=settings.message_write_retry_backoff,
+)
@@ -3,26 +3,52 @@ Chat HTTP endpoints for session management
 Reference: https://fastapi.tiangolo.com/tutorial/bigger-applications/
 """
 
+import uuid
 from typing import Annotated, List
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+from sqlalchemy import Row, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
 from app.shared.database import get_session
-from app.auth.dependencies import get_current_active_user
-from app.auth.models import User
-from app.chat.schemas import ChatSessionCreate, ChatSessionResponse
-from app.chat.models import ChatSession, ChatMessage
+from app.auth.dependencies import get_current_user
+from app.auth.models import UserPrincipal, ChatSession, ChatMessage
+from app.chat.schemas import ChatSessionCreate, ChatSessionResponse, ChatMessageResponse
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
+
+
+async def batch_fetch_sessions(
+    session: AsyncSession, user_id: uuid.UUID
+) -> List[Row]:
+    """
+    Fetch a user's chat sessions with message count and last activity.
+    
+    Single Responsibility: Session listing query in a single round-trip
+    """
+    statement = (
+        select(
+            ChatSession.id,
+            ChatSession.title,
+            ChatSession.created_at,
+            ChatSession.updated_at,
+            func.count(ChatMessage.id).label("message_count"),
+            func.max(ChatMessage.created_at).label("last_message_at"),
+        )
+        .outerjoin(ChatMessage, ChatMessage.session_id == ChatSession.id)
+        .where(ChatSession.user_id == user_id)
+        .group_by(ChatSession.id)
+        .order_by(ChatSession.updated_at.desc())
+    )
+    
+    result = await session.execute(statement)
+    return result.all()
 
 
 @router.get("/sessions", response_model=List[ChatSessionResponse])
 async def get_chat_sessions(
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)],
     session: Annotated[AsyncSession, Depends(get_session)]
 ):
     """
@@ -30,20 +56,15 @@ async def get_chat_sessions(
     
     Single Responsibility: Chat session listing
     """
-    statement = select(ChatSession).where(
-        ChatSession.user_id == current_user.id
-    ).order_by(ChatSession.updated_at.desc())
-    
-    result = await session.execute(statement)
-    sessions = result.scalars().all()
-    
-    return [ChatSessionResponse.model_validate(s) for s in sessions]
+    rows = await batch_fetch_sessions(session, current_user.id)
+    # Rows come straight from the database, so skip field validation
+    return [ChatSessionResponse.model_construct(**row._mapping) for row in rows]
 
 
 @router.post("/sessions", response_model=ChatSessionResponse)
 async def create_chat_session(
     session_create: ChatSessionCreate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)],
     session: Annotated[AsyncSession, Depends(get_session)]
 ):
     """
@@ -60,13 +81,18 @@ async def create_chat_session(
     await session.commit()
     await session.refresh(chat_session)
     
-    return ChatSessionResponse.model_validate(chat_session)
+    return ChatSessionResponse.model_construct(
+        id=chat_session.id,
+        title=chat_session.title,
+        created_at=chat_session.created_at,
+        updated_at=chat_session.updated_at,
+    )
 
 
 @router.get("/sessions/{session_id}/messages")
 async def get_session_messages(
-    session_id: str,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    session_id: uuid.UUID,
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)],
     session: Annotated[AsyncSession, Depends(get_session)]
 ):
     """
@@ -79,8 +105,11 @@ async def get_session_messages(
         ChatSession.user_id == current_user.id
     ).order_by(ChatMessage.created_at)
     
-    result = await session.execute(statement)
-    messages = result.scalars().all()
-    
-    return [{"id": str(m.id), "content": m.content, "is_user": m.is_user, "created_at": m.created_at} for m in messages]
+    messages = await session.scalars(statement)
+    return [
+        ChatMessageResponse.model_construct(
+            id=m.id, content=m.content, is_user=m.is_user, created_at=m.created_at
+        )
+        for m in messages
+    ]
 
@@ -2,7 +2,7 @@
 Chat-related Pydantic schemas
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime
 import uuid
@@ -23,10 +23,14 @@ class ChatSessionResponse(BaseModel):
     
     Single Responsibility: Chat session data serialization
     """
+    model_config = ConfigDict(from_attributes=True)
+    
     id: uuid.UUID
     title: str
     created_at: datetime
     updated_at: datetime
+    message_count: int = 0
+    last_message_at: Optional[datetime] = None
 
 
 class ChatMessageCreate(BaseModel):
@@ -45,6 +49,8 @@ class ChatMessageResponse(BaseModel):
     
     Single Responsibility: Message data serialization
     """
+    model_config = ConfigDict(from_attributes=True)
+    
     id: uuid.UUID
     content: str
     is_user: bool
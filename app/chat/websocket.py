@@ -3,18 +3,83 @@ WebSocket implementation for real-time chat
 Reference: https://fastapi.tiangolo.com/advanced/websockets/
 """
 
+import asyncio
+import html
 import json
-from typing import Dict, List
+import time
+import uuid
+from typing import Annotated, Dict, List, Optional, Tuple
 from datetime import datetime
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
 
 from app.shared.database import sessionmanager
-from app.chat.llm_service import llm_service
+from app.auth.dependencies import get_token_principal
+from app.auth.models import ChatSession
+from app.chat.llm_service import OllamaService, get_llm_service
+from app.chat.persistence import message_writer
 from app.rag.service import rag_service
 
 websocket_router = APIRouter()
 
+# HTML fragments sent over the socket, filled with str.format per message.
+# All interpolated text must be passed through html.escape first.
+USER_MESSAGE_TEMPLATE = '''
+<div id="chat-messages" hx-swap-oob="beforeend">
+    <div class="message user-message">
+        <div class="message-header">
+            <span class="username">{username}</span>
+            <span class="timestamp">{timestamp}</span>
+        </div>
+        <div class="message-content">{message}</div>
+    </div>
+</div>
+'''
+
+ASSISTANT_MESSAGE_TEMPLATE = '''
+<div id="chat-messages" hx-swap-oob="beforeend">
+    <div class="message assistant-message">
+        <div class="message-header">
+            <span class="username">AI Assistant</span>
+            <span class="timestamp">{timestamp}</span>
+        </div>
+        <div class="message-content"{content_id}>{message}</div>
+    </div>
+</div>
+'''
+
+SYSTEM_MESSAGE_TEMPLATE = '''
+<div id="chat-messages" hx-swap-oob="beforeend">
+    <div class="message system-message">
+        <span class="message-text">{message}</span>
+        <span class="timestamp">{timestamp}</span>
+    </div>
+</div>
+'''
+
+STREAM_CHUNK_TEMPLATE = '<div id="message-{message_id}" hx-swap-oob="beforeend">{chunk}</div>'
+
+TYPING_INDICATOR_TEMPLATE = '<div id="typing-indicator" hx-swap-oob="innerHTML">{content}</div>'
+
+TYPING_TEXT_TEMPLATE = "<span class='typing'>{username} is typing...</span>"
+
+# (minute since epoch, formatted time) of the last rendered timestamp
+_timestamp_cache: Tuple[int, str] = (-1, "")
+
+
+def _cached_timestamp() -> str:
+    """
+    Return the current local time as shown in chat, formatted once per minute.
+    
+    Single Responsibility: Message timestamp formatting
+    """
+    global _timestamp_cache
+    minute = int(time.time()) // 60
+    if _timestamp_cache[0] != minute:
+        _timestamp_cache = (minute, datetime.now().strftime("%I:%M %p"))
+    return _timestamp_cache[1]
+
 
 class ConnectionManager:
     """
@@ -24,7 +89,12 @@ class ConnectionManager:
     """
     
     def __init__(self):
-        self.active_connections: Dict[str, Dict[str, WebSocket]] = {}
+        # room_id -> [(user_id, websocket)], iterated on every broadcast
+        self.active_connections: Dict[str, List[Tuple[str, WebSocket]]] = {}
+        # websocket -> (user_id, room_id), for direct lookup on disconnect
+        self._connection_index: Dict[WebSocket, Tuple[str, str]] = {}
+        # Mutations below never await, so they are atomic on the event loop
+        # and need no lock; broadcasts iterate over a snapshot.
     
     async def connect(self, websocket: WebSocket, user_id: str, room_id: str):
         """
@@ -34,23 +104,27 @@ class ConnectionManager:
         """
         await websocket.accept()
         
-        if room_id not in self.active_connections:
-            self.active_connections[room_id] = {}
-        
-        self.active_connections[room_id][user_id] = websocket
+        self.active_connections.setdefault(room_id, []).append((user_id, websocket))
+        self._connection_index[websocket] = (user_id, room_id)
         
         # Send welcome message
         await self.send_system_message(room_id, f"{user_id} joined the chat")
     
-    def disconnect(self, user_id: str, room_id: str):
+    def disconnect(self, websocket: WebSocket):
         """
-        Remove connection from room.
+        Remove connection from its room.
         
         Single Responsibility: Connection cleanup
         """
-        if room_id in self.active_connections:
-            self.active_connections[room_id].pop(user_id, None)
-            if not self.active_connections[room_id]:
+        entry = self._connection_index.pop(websocket, None)
+        if entry is None:
+            return
+        
+        user_id, room_id = entry
+        room = self.active_connections.get(room_id)
+        if room is not None:
+            room.remove((user_id, websocket))
+            if not room:
                 del self.active_connections[room_id]
     
     async def send_personal_message(self, message: str, websocket: WebSocket):
@@ -76,21 +150,24 @@ class ConnectionManager:
         
         Single Responsibility: Room-wide message broadcasting
         """
-        if room_id not in self.active_connections:
+        room = self.active_connections.get(room_id)
+        if not room:
             return
         
-        disconnected_users = []
+        # Snapshot recipients first so connects/disconnects during the sends
+        # cannot change who is being iterated
+        recipients = [
+            websocket for user_id, websocket in room if user_id != exclude_user
+        ]
+        results = await asyncio.gather(
+            *(websocket.send_text(html_content) for websocket in recipients),
+            return_exceptions=True,
+        )
         
-        for user_id, websocket in self.active_connections[room_id].items():
-            if user_id != exclude_user:
-                try:
-                    await websocket.send_text(html_content)
-                except WebSocketDisconnect:
-                    disconnected_users.append(user_id)
-        
-        # Clean up disconnected users
-        for user_id in disconnected_users:
-            self.disconnect(user_id, room_id)
+        # A failed send means the socket is gone; clean it up
+        for websocket, result in zip(recipients, results, strict=True):
+            if isinstance(result, Exception):
+                self.disconnect(websocket)
     
     def _create_message_html(self, message: str, user_id: str) -> str:
         """
@@ -98,37 +175,36 @@ class ConnectionManager:
         
         Single Responsibility: User message HTML generation
         """
-        timestamp = datetime.now().strftime("%I:%M %p")
-        return f'''
-        <div id="chat-messages" hx-swap-oob="beforeend">
-            <div class="message user-message">
-                <div class="message-header">
-                    <span class="username">{user_id}</span>
-                    <span class="timestamp">{timestamp}</span>
-                </div>
-                <div class="message-content">{message}</div>
-            </div>
-        </div>
-        '''
+        return USER_MESSAGE_TEMPLATE.format(
+            username=html.escape(user_id),
+            timestamp=_cached_timestamp(),
+            message=html.escape(message),
+        )
     
-    def _create_assistant_message_html(self, message: str) -> str:
+    def _create_assistant_message_html(
+        self, message: str, message_id: Optional[str] = None
+    ) -> str:
         """
         Create HTML for assistant message.
         
         Single Responsibility: Assistant message HTML generation
         """
-        timestamp = datetime.now().strftime("%I:%M %p")
-        return f'''
-        <div id="chat-messages" hx-swap-oob="beforeend">
-            <div class="message assistant-message">
-                <div class="message-header">
-                    <span class="username">AI Assistant</span>
-                    <span class="timestamp">{timestamp}</span>
-                </div>
-                <div class="message-content">{message}</div>
-            </div>
-        </div>
-        '''
+        content_id = f' id="message-{message_id}"' if message_id else ""
+        return ASSISTANT_MESSAGE_TEMPLATE.format(
+            timestamp=_cached_timestamp(),
+            content_id=content_id,
+            message=html.escape(message),
+        )
+    
+    def _create_stream_chunk_html(self, message_id: str, chunk: str) -> str:
+        """
+        Create HTML that appends a streamed chunk to an assistant message.
+        
+        Single Responsibility: Streamed chunk HTML generation
+        """
+        return STREAM_CHUNK_TEMPLATE.format(
+            message_id=message_id, chunk=html.escape(chunk)
+        )
     
     def _create_system_message_html(self, message: str) -> str:
         """
@@ -136,15 +212,69 @@ class ConnectionManager:
         
         Single Responsibility: System message HTML generation
         """
-        timestamp = datetime.now().strftime("%I:%M %p")
-        return f'''
-        <div id="chat-messages" hx-swap-oob="beforeend">
-            <div class="message system-message">
-                <span class="message-text">{message}</span>
-                <span class="timestamp">{timestamp}</span>
-            </div>
-        </div>
-        '''
+        return SYSTEM_MESSAGE_TEMPLATE.format(
+            message=html.escape(message), timestamp=_cached_timestamp()
+        )
+    
+    def _create_typing_html(self, user_id: str, is_typing: bool) -> str:
+        """
+        Create HTML for the typing indicator.
+        
+        Single Responsibility: Typing indicator HTML generation
+        """
+        content = (
+            TYPING_TEXT_TEMPLATE.format(username=html.escape(user_id))
+            if is_typing else ""
+        )
+        return TYPING_INDICATOR_TEMPLATE.format(content=content)
+
+
+def _parse_chat_session_id(room_id: str) -> Optional[uuid.UUID]:
+    """Return the chat session a room is bound to, if its id names one."""
+    try:
+        return uuid.UUID(room_id)
+    except ValueError:
+        return None
+
+
+def _websocket_token(websocket: WebSocket) -> Optional[str]:
+    """
+    Return the bearer token sent with the handshake.
+    
+    Browsers cannot set headers on a WebSocket, so the token may also be
+    passed as the ``token`` query parameter.
+    """
+    scheme, _, token = websocket.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return token
+    return websocket.query_params.get("token") or None
+
+
+async def _authorized_chat_session_id(
+    websocket: WebSocket, room_id: str
+) -> Optional[uuid.UUID]:
+    """
+    Return the chat session to persist the room's messages into, or None.
+    
+    Messages are only stored when the room id names a chat session owned
+    by the active user the socket's token authenticates; otherwise the
+    room still works but nothing is written to the database.
+    
+    Single Responsibility: Chat session ownership check
+    """
+    chat_session_id = _parse_chat_session_id(room_id)
+    token = _websocket_token(websocket)
+    if chat_session_id is None or token is None:
+        return None
+    
+    async with sessionmanager.session() as session:
+        user = await get_token_principal(session, token)
+        if user is None or not user.is_active:
+            return None
+        owner_id = await session.scalar(
+            select(ChatSession.user_id).where(ChatSession.id == chat_session_id)
+        )
+    return chat_session_id if owner_id == user.id else None
 
 
 # Global connection manager
@@ -152,13 +282,23 @@ manager = ConnectionManager()
 
 
 @websocket_router.websocket("/chat/{room_id}/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, room_id: str, user_id: str):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    room_id: str,
+    user_id: str,
+    llm: Annotated[OllamaService, Depends(get_llm_service)]
+):
     """
     WebSocket endpoint for chat communication.
     
+    Messages are persisted only for a room named after a chat session that
+    belongs to the user authenticated by the handshake's bearer token
+    (``Authorization`` header or ``token`` query parameter).
+    
     Single Responsibility: WebSocket message handling
     """
     await manager.connect(websocket, user_id, room_id)
+    chat_session_id = await _authorized_chat_session_id(websocket, room_id)
     
     try:
         while True:
@@ -177,6 +317,8 @@ async def websocket_endpoint(websocket: WebSocket, room_id: str, user_id: str):
                 # Broadcast user message to room
                 user_html = manager._create_message_html(message_content, user_id)
                 await manager.broadcast_to_room(room_id, user_html)
+                if chat_session_id:
+                    message_writer.enqueue(chat_session_id, message_content, is_user=True)
                 
                 # Process AI response
                 try:
@@ -184,14 +326,29 @@ async def websocket_endpoint(websocket: WebSocket, room_id: str, user_id: str):
                         # RAG query
                         query = message_content[5:]
                         result = await rag_service.query_with_rag(query)
-                        ai_response = result["answer"]
+                        answer = result["answer"]
+                        ai_html = manager._create_assistant_message_html(answer)
+                        await manager.broadcast_to_room(room_id, ai_html)
                     else:
-                        # Regular LLM query
-                        ai_response = await llm_service.generate_response(message_content)
+                        # Regular LLM query: open an empty assistant message and
+                        # append tokens to it as they arrive
+                        message_id = uuid.uuid4().hex
+                        ai_html = manager._create_assistant_message_html(
+                            "", message_id
+                        )
+                        await manager.broadcast_to_room(room_id, ai_html)
+                        
+                        chunks = []
+                        async for chunk in llm.stream_generate(message_content):
+                            chunks.append(chunk)
+                            chunk_html = manager._create_stream_chunk_html(
+                                message_id, chunk
+                            )
+                            await manager.broadcast_to_room(room_id, chunk_html)
+                        answer = "".join(chunks)
                     
-                    # Send AI response
-                    ai_html = manager._create_assistant_message_html(ai_response)
-                    await manager.broadcast_to_room(room_id, ai_html)
+                    if chat_session_id:
+                        message_writer.enqueue(chat_session_id, answer, is_user=False)
                     
                 except Exception as e:
                     error_html = manager._create_system_message_html(
@@ -202,13 +359,9 @@ async def websocket_endpoint(websocket: WebSocket, room_id: str, user_id: str):
             elif message_type == "typing":
                 # Handle typing indicators
                 is_typing = message_data.get("is_typing", False)
-                typing_html = f'''
-                <div id="typing-indicator" hx-swap-oob="innerHTML">
-                    {f"<span class='typing'>{user_id} is typing...</span>" if is_typing else ""}
-                </div>
-                '''
+                typing_html = manager._create_typing_html(user_id, is_typing)
                 await manager.broadcast_to_room(room_id, typing_html, exclude_user=user_id)
                 
     except WebSocketDisconnect:
-        manager.disconnect(user_id, room_id)
+        manager.disconnect(websocket)
         await manager.send_system_message(room_id, f"{user_id} left the chat")
@@ -4,17 +4,24 @@ Reference: https://fastapi.tiangolo.com/tutorial/bigger-applications/
 """
 
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request, HTTPException
+from typing import Annotated
+from fastapi import Depends, FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
+from starlette.concurrency import run_in_threadpool
 import uvicorn
 
 from app.shared.config import settings
 from app.shared.database import sessionmanager
+from app.shared.templates import create_templates, get_templates
 from app.shared.cache import cache_manager
+from app.chat.llm_service import llm_service
+from app.chat.persistence import message_writer
+from app.rag.chunking import document_processor
+from app.rag.vectorstore import vector_store
 from app.auth.router import router as auth_router
 from app.chat.router import router as chat_router
 from app.chat.websocket import websocket_router
@@ -31,15 +38,26 @@ async def lifespan(app: FastAPI):
     # Startup
     print("Starting up application...")
     await sessionmanager.init_db()
+    app.state.templates = create_templates()
     await cache_manager.connect()
+    await llm_service.connect()
+    app.state.llm = llm_service
+    await message_writer.start()
+    await run_in_threadpool(vector_store.initialize)
+    await vector_store.start_autosave()
     print("Application startup complete")
     
     yield
     
     # Shutdown
     print("Shutting down application...")
+    await message_writer.stop()
     await sessionmanager.close()
     await cache_manager.disconnect()
+    await llm_service.disconnect()
+    document_processor.shutdown()
+    await vector_store.stop_autosave()
+    vector_store.flush()
     print("Application shutdown complete")
 
 
@@ -48,15 +66,15 @@ app = FastAPI(
     title=settings.app_name,
     version=settings.version,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/api/docs" if settings.environment != "production" else None,
     redoc_url="/api/redoc" if settings.environment != "production" else None,
 )
 
-# Security middleware
-app.add_middleware(
-    TrustedHostMiddleware, 
-    allowed_hosts=["localhost", "127.0.0.1", "*"] if settings.debug else ["localhost"]
-)
+# Security middleware. In debug mode any host is allowed, so the check would
+# be a no-op hop on every request and is left out.
+if not settings.debug:
+    app.add_middleware(TrustedHostMiddleware, allowed_hosts=["localhost"])
 
 # CORS middleware for development
 if settings.environment == "development":
@@ -68,9 +86,8 @@ if settings.environment == "development":
         allow_headers=["*"],
     )
 
-# Static files and templates
+# Static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
-templates = Jinja2Templates(directory="app/templates")
 
 # Include routers
 app.include_router(auth_router, prefix="/api/v1/auth", tags=["Authentication"])
@@ -94,7 +111,10 @@ async def health_check():
 
 
 @app.get("/", response_class=HTMLResponse)
-async def read_root(request: Request):
+async def read_root(
+    request: Request,
+    templates: Annotated[Jinja2Templates, Depends(get_templates)]
+):
     """
     Serve main application page.
     
@@ -113,7 +133,7 @@ async def not_found_handler(request: Request, exc: HTTPException):
     
     Single Responsibility: 404 error handling
     """
-    return templates.TemplateResponse(
+    return request.app.state.templates.TemplateResponse(
         "errors/404.html", 
         {"request": request}, 
         status_code=404
@@ -121,10 +141,23 @@ async def not_found_handler(request: Request, exc: HTTPException):
 
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=settings.debug,
-        log_level="info"
-    )
+    if settings.environment == "production":
+        # Require the C event loop and HTTP parser rather than silently
+        # falling back to the pure-Python ones
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=settings.server_workers,
+            loop="uvloop",
+            http="httptools",
+            log_level="info"
+        )
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=settings.debug,
+            log_level="info"
+        )
@@ -2,10 +2,42 @@
 Document processing and chunking for RAG
 """
 
+import multiprocessing
 import re
-from typing import List, Dict, Any
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from pathlib import Path
 import fitz  # PyMuPDF for PDF processing
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from app.shared.config import settings
+
+# Optional PDF text backends, selected with settings.pdf_backend
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+try:
+    import pymupdf4llm
+except ImportError:
+    pymupdf4llm = None
+
+_WHITESPACE_RE = re.compile(r'\s+')
+# Anything but word characters, whitespace and basic punctuation
+_DISALLOWED_RE = re.compile(r'[^\w\s\.\,\!\?\:\;\-\(\)]')
+# The same filter as a str.translate table for pure-ASCII text
+_ASCII_DISALLOWED = str.maketrans(
+    {c: None for c in map(chr, range(128)) if _DISALLOWED_RE.match(c)}
+)
+
+_SENTENCE_TERMINATORS = [ord('.'), ord('!'), ord('?')]
+_SPACE = ord(' ')
+
+# Split point before each markdown heading line
+_MARKDOWN_HEADING_RE = re.compile(r'^(?=#{1,6} )', re.MULTILINE)
 
 
 class DocumentProcessor:
@@ -18,6 +50,15 @@ class DocumentProcessor:
     def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._process_pool_lock = threading.Lock()
+    
+    def shutdown(self):
+        """Stop the PDF worker processes, if any were started."""
+        with self._process_pool_lock:
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=True, cancel_futures=True)
+                self._process_pool = None
     
     async def process_file(self, file_path: Path, filename: str) -> List[Dict[str, Any]]:
         """
@@ -27,51 +68,93 @@ class DocumentProcessor:
         """
         file_extension = file_path.suffix.lower()
         
+        # Extraction and chunking are synchronous and CPU-bound; run them in
+        # the threadpool so the event loop keeps serving other clients
         if file_extension == '.pdf':
-            return await self._process_pdf(file_path, filename)
+            return await run_in_threadpool(self._process_pdf, file_path, filename)
         elif file_extension == '.txt':
-            return await self._process_text(file_path, filename)
+            return await run_in_threadpool(self._process_text, file_path, filename)
         else:
             raise ValueError(f"Unsupported file type: {file_extension}")
     
-    async def _process_pdf(self, file_path: Path, filename: str) -> List[Dict[str, Any]]:
+    def _process_pdf(self, file_path: Path, filename: str) -> List[Dict[str, Any]]:
         """
         Extract and chunk PDF content.
         
         Single Responsibility: PDF text extraction
         """
-        chunks = []
-        
         try:
-            doc = fitz.open(file_path)
-            
-            for page_num in range(doc.page_count):
-                page = doc.load_page(page_num)
-                text = page.get_text()
-                
-                if text.strip():  # Only process pages with text
-                    cleaned_text = self._clean_text(text)
-                    page_chunks = self._chunk_text(cleaned_text)
-                    
-                    for i, chunk in enumerate(page_chunks):
-                        chunks.append({
-                            "content": chunk,
-                            "metadata": {
-                                "source": filename,
-                                "page": page_num + 1,
-                                "chunk_index": i,
-                                "file_type": "pdf"
-                            }
-                        })
+            with fitz.open(file_path) as doc:
+                page_count = doc.page_count
+            workers = settings.pdf_workers
+            if workers <= 1 or page_count < settings.pdf_parallel_min_pages:
+                return self._extract_pages(file_path, filename, 0, page_count)
             
-            doc.close()
+            # Each worker re-opens the file and extracts one contiguous page
+            # range; map() returns shards in submission order, so pages stay
+            # in document order when merged.
+            shard_size = -(-page_count // workers)
+            shards = [
+                (str(file_path), filename, start, min(start + shard_size, page_count),
+                 self.chunk_size, self.chunk_overlap)
+                for start in range(0, page_count, shard_size)
+            ]
+            chunks = []
+            for shard_chunks in self._get_process_pool().map(_extract_pdf_shard, shards):
+                chunks.extend(shard_chunks)
+            return chunks
             
         except Exception as e:
             raise Exception(f"Error processing PDF {filename}: {str(e)}")
+    
+    def _extract_pages(
+        self, file_path: Path, filename: str, start: int, stop: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract and chunk a range of pages from a PDF.
+        
+        Single Responsibility: PDF page range extraction
+        """
+        chunks = []
+        
+        for page_num, sections in _iter_page_sections(file_path, start, stop):
+            # Chunks never span sections, so markdown headings start a new chunk
+            page_chunks = [
+                chunk
+                for text in sections
+                if text.strip()  # Only process sections with text
+                for chunk in self._chunk_text(self._clean_text(text))
+            ]
+            
+            for i, chunk in enumerate(page_chunks):
+                chunks.append({
+                    "content": chunk,
+                    "metadata": {
+                        "source": filename,
+                        "page": page_num + 1,
+                        "chunk_index": i,
+                        "file_type": "pdf"
+                    }
+                })
         
         return chunks
     
-    async def _process_text(self, file_path: Path, filename: str) -> List[Dict[str, Any]]:
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """
+        Lazily start the PDF worker processes.
+        
+        Workers are spawned rather than forked: the parent runs an event loop
+        and threads, which are unsafe to fork.
+        """
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=settings.pdf_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._process_pool
+    
+    def _process_text(self, file_path: Path, filename: str) -> List[Dict[str, Any]]:
         """
         Process plain text file.
         
@@ -107,11 +190,15 @@ class DocumentProcessor:
         
         Single Responsibility: Text normalization
         """
+        if text.isascii():
+            # str.split() breaks on exactly the characters \s matches
+            return " ".join(text.split()).translate(_ASCII_DISALLOWED).strip()
+        
         # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         
         # Remove special characters but keep punctuation
-        text = re.sub(r'[^\w\s\.\,\!\?\:\;\-\(\)]', '', text)
+        text = _DISALLOWED_RE.sub('', text)
         
         return text.strip()
     
@@ -124,25 +211,30 @@ class DocumentProcessor:
         if len(text) <= self.chunk_size:
             return [text]
         
+        # Positions of every sentence terminator and space, found in one
+        # vectorized pass over the code points (UTF-32 keeps one element per
+        # character, so positions match str indices)
+        code_points = np.frombuffer(
+            text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32
+        )
+        terminators = np.flatnonzero(np.isin(code_points, _SENTENCE_TERMINATORS))
+        spaces = np.flatnonzero(code_points == _SPACE)
+        
         chunks = []
         start = 0
+        text_length = len(text)
         
-        while start < len(text):
+        while start < text_length:
             # Find end position
             end = start + self.chunk_size
             
-            if end >= len(text):
+            if end >= text_length:
                 # Last chunk
                 chunks.append(text[start:])
                 break
             
-            # Try to break at sentence boundary
-            chunk_text = text[start:end]
-            last_sentence_end = max(
-                chunk_text.rfind('.'),
-                chunk_text.rfind('!'),
-                chunk_text.rfind('?')
-            )
+            # Try to break at sentence boundary: last terminator in [start, end)
+            last_sentence_end = _last_position_before(terminators, start, end)
             
             if last_sentence_end > self.chunk_size // 2:
                 # Found good break point
@@ -150,18 +242,97 @@ class DocumentProcessor:
                 start = start + last_sentence_end + 1 - self.chunk_overlap
             else:
                 # No good break point, use word boundary
-                chunk_text = text[start:end]
-                last_space = chunk_text.rfind(' ')
+                last_space = _last_position_before(spaces, start, end)
                 
                 if last_space > self.chunk_size // 2:
                     chunks.append(text[start:start + last_space])
                     start = start + last_space + 1 - self.chunk_overlap
                 else:
                     # Force split
-                    chunks.append(chunk_text)
+                    chunks.append(text[start:end])
                     start = end - self.chunk_overlap
         
-        return [chunk.strip() for chunk in chunks if chunk.strip()]
+        return [stripped for chunk in chunks if (stripped := chunk.strip())]
+
+
+def _last_position_before(positions: np.ndarray, start: int, end: int) -> int:
+    """
+    Offset from ``start`` of the last position in ``[start, end)``, or -1.
+    
+    Mirrors ``text[start:end].rfind(...)`` using a sorted position array.
+    """
+    i = int(np.searchsorted(positions, end)) - 1
+    if i >= 0 and positions[i] >= start:
+        return int(positions[i]) - start
+    return -1
+
+
+def _resolve_pdf_backend() -> str:
+    """Return the configured PDF backend, or "pymupdf" if it is not installed."""
+    backend = settings.pdf_backend
+    if backend == "pdfium" and pdfium is None:
+        print("pypdfium2 is not installed; falling back to PyMuPDF")
+        return "pymupdf"
+    if backend == "markdown" and pymupdf4llm is None:
+        print("pymupdf4llm is not installed; falling back to PyMuPDF")
+        return "pymupdf"
+    return backend
+
+
+def _iter_page_sections(
+    file_path: Path, start: int, stop: int
+) -> Iterator[Tuple[int, List[str]]]:
+    """
+    Yield ``(page_number, sections)`` for each page in ``[start, stop)``.
+    
+    Plain-text backends give one section per page; the markdown backend
+    splits each page before its headings.
+    """
+    backend = _resolve_pdf_backend()
+    
+    if backend == "pdfium":
+        pdf = pdfium.PdfDocument(str(file_path))
+        try:
+            for page_num in range(start, stop):
+                page = pdf[page_num]
+                textpage = page.get_textpage()
+                try:
+                    yield page_num, [textpage.get_text_range()]
+                finally:
+                    textpage.close()
+                    page.close()
+        finally:
+            pdf.close()
+    
+    elif backend == "markdown":
+        with fitz.open(file_path) as doc:
+            pages = pymupdf4llm.to_markdown(
+                doc, pages=list(range(start, stop)), page_chunks=True,
+                show_progress=False
+            )
+        for page in pages:
+            yield (
+                page["metadata"]["page"] - 1,
+                _MARKDOWN_HEADING_RE.split(page["text"]),
+            )
+    
+    else:
+        with fitz.open(file_path) as doc:
+            for page_num in range(start, stop):
+                yield page_num, [doc.load_page(page_num).get_text()]
+
+
+def _extract_pdf_shard(
+    shard: Tuple[str, str, int, int, int, int]
+) -> List[Dict[str, Any]]:
+    """
+    Process pool entry point: extract and chunk one page range of a PDF.
+    
+    PDF documents cannot be pickled, so the worker opens the file itself.
+    """
+    file_path, filename, start, stop, chunk_size, chunk_overlap = shard
+    processor = DocumentProcessor(chunk_size, chunk_overlap)
+    return processor._extract_pages(Path(file_path), filename, start, stop)
 
 
 # Global document processor instance
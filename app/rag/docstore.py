@@ -0,0 +1,127 @@
+"""
+SQLite-backed storage for the documents behind FAISS vectors
+Reference: https://www.sqlite.org/wal.html
+"""
+
+import pickle
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+import orjson
+from cachetools import LRUCache
+
+
+class DocumentStore:
+    """
+    Maps FAISS vector ids to document content and metadata.
+
+    Rows are written as they are added instead of re-serializing the whole
+    store, and reads go through a small LRU cache for frequently returned
+    documents.
+
+    Single Responsibility: Document persistence and lookup by vector id
+    """
+
+    def __init__(self, db_path: Path, cache_size: int = 4096):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._cache: LRUCache[int, Dict[str, Any]] = LRUCache(maxsize=cache_size)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            "id INTEGER PRIMARY KEY, content TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def add_many(self, rows: Iterable[Tuple[int, str, Dict[str, Any]]]):
+        """
+        Store documents under their vector ids in one transaction.
+
+        Single Responsibility: Batch document insertion
+        """
+        params = [
+            (doc_id, content, orjson.dumps(metadata).decode())
+            for doc_id, content, metadata in rows
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO docs (id, content, metadata) VALUES (?, ?, ?)",
+                params,
+            )
+            for doc_id, _, _ in params:
+                self._cache.pop(doc_id, None)
+
+    def get_many(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Fetch documents by vector id; ids without a document are omitted.
+
+        Single Responsibility: Batch document lookup
+        """
+        found: Dict[int, Dict[str, Any]] = {}
+        with self._lock:
+            misses = []
+            for doc_id in ids:
+                doc = self._cache.get(doc_id)
+                if doc is None:
+                    misses.append(doc_id)
+                else:
+                    found[doc_id] = doc
+
+            if misses:
+                placeholders = ",".join("?" * len(misses))
+                cursor = self._conn.execute(
+                    f"SELECT id, content, metadata FROM docs WHERE id IN ({placeholders})",
+                    misses,
+                )
+                for doc_id, content, metadata in cursor:
+                    doc = {"content": content, "metadata": orjson.loads(metadata)}
+                    self._cache[doc_id] = doc
+                    found[doc_id] = doc
+        return found
+
+    def get_from(self, start_id: int) -> List[Tuple[int, str]]:
+        """
+        Return ``(id, content)`` for every document with id >= start_id,
+        ordered by id.
+
+        Single Responsibility: Ordered document range lookup
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, content FROM docs WHERE id >= ? ORDER BY id", (start_id,)
+            ).fetchall()
+
+    def count(self) -> int:
+        """Return the number of stored documents."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def import_pickle(self, pickle_path: Path) -> bool:
+        """
+        One-time migration from the previous pickled ``{id: document}`` store.
+
+        The pickle is renamed afterwards so it is not imported again.
+
+        Single Responsibility: Legacy store migration
+        """
+        pickle_path = Path(pickle_path)
+        if not pickle_path.exists():
+            return False
+        with open(pickle_path, "rb") as f:
+            documents = pickle.load(f)
+        self.add_many(
+            (int(doc_id), doc["content"], doc.get("metadata", {}))
+            for doc_id, doc in documents.items()
+        )
+        pickle_path.rename(pickle_path.with_suffix(".pkl.migrated"))
+        print(f"Migrated {len(documents)} documents from {pickle_path.name}")
+        return True
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
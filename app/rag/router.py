@@ -6,18 +6,22 @@ import os
 import uuid
 from typing import Annotated, List
 from pathlib import Path
+import aiofiles
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.shared.database import get_session
-from app.auth.dependencies import get_current_active_user
-from app.auth.models import User
+from app.auth.dependencies import get_current_user
+from app.auth.models import UserPrincipal
 from app.rag.service import rag_service
 from app.rag.chunking import document_processor
 from app.shared.config import settings
 
 router = APIRouter()
 
+# Uploads are copied to disk in pieces of this size
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1MB
+
 # Ensure upload directory exists
 upload_dir = Path(settings.upload_dir)
 upload_dir.mkdir(exist_ok=True)
@@ -57,7 +61,7 @@ async def process_document_background(file_path: Path, filename: str, user_id: s
 async def upload_document(
     background_tasks: BackgroundTasks,
     file: Annotated[UploadFile, File()],
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)],
     session: Annotated[AsyncSession, Depends(get_session)]
 ):
     """
@@ -75,20 +79,24 @@ async def upload_document(
             detail=f"File type {file_extension} not supported. Allowed: {allowed_types}"
         )
     
-    # Validate file size
-    content = await file.read()
-    if len(content) > settings.max_file_size:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File size exceeds maximum allowed size of {settings.max_file_size} bytes"
-        )
-    
-    # Save file temporarily
+    # Save file temporarily, enforcing the size limit as it streams in
     temp_filename = f"{uuid.uuid4()}_{file.filename}"
     temp_path = upload_dir / temp_filename
     
-    with open(temp_path, "wb") as temp_file:
-        temp_file.write(content)
+    total_size = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as temp_file:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                total_size += len(chunk)
+                if total_size > settings.max_file_size:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"File size exceeds maximum allowed size of {settings.max_file_size} bytes"
+                    )
+                await temp_file.write(chunk)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
     
     # Process document in background
     background_tasks.add_task(
@@ -101,14 +109,14 @@ async def upload_document(
     return {
         "message": f"Document {file.filename} uploaded successfully and is being processed",
         "filename": file.filename,
-        "size": len(content)
+        "size": total_size
     }
 
 
 @router.post("/query")
 async def query_documents(
     query: Annotated[str, Form()],
-    current_user: Annotated[User, Depends(get_current_active_user)]
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)]
 ):
     """
     Query documents using RAG.
@@ -124,7 +132,7 @@ async def query_documents(
 
 @router.get("/stats")
 async def get_knowledge_base_stats(
-    current_user: Annotated[User, Depends(get_current_active_user)]
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)]
 ):
     """
     Get knowledge base statistics.
@@ -2,9 +2,15 @@
 RAG (Retrieval-Augmented Generation) service combining vector search with LLM
 """
 
+import hashlib
 from typing import List, Dict, Optional
 from app.rag.vectorstore import vector_store
 from app.chat.llm_service import llm_service
+from app.shared.cache import cache_manager
+from app.shared.config import settings
+
+# One retrieved document as it appears in the LLM context
+CONTEXT_SOURCE_TEMPLATE = "Source {}: {}"
 
 
 class RAGService:
@@ -30,6 +36,61 @@ class RAGService:
         
         Single Responsibility: RAG pipeline execution
         """
+        cache_key = self._answer_cache_key(query, k, score_threshold, model)
+        cached = None
+        if cache_key is not None:
+            try:
+                cached = await cache_manager.get(cache_key)
+            except Exception as e:
+                print(f"RAG answer cache unavailable: {e}")
+        if isinstance(cached, dict):
+            return cached
+        
+        result = await self._run_rag_query(query, k, score_threshold, model)
+        
+        # Only answers grounded in retrieved sources are cached. An empty
+        # retrieval may come from a transient search failure, and caching
+        # the context-free answer would serve it for the whole TTL.
+        if cache_key is not None and result["context_used"] > 0:
+            try:
+                await cache_manager.set(
+                    cache_key, result, expire=settings.rag_answer_cache_ttl
+                )
+            except Exception as e:
+                print(f"Failed to cache RAG answer: {e}")
+        return result
+    
+    def _answer_cache_key(
+        self, query: str, k: int, score_threshold: float, model: Optional[str]
+    ) -> Optional[str]:
+        """
+        Cache key for a RAG answer, or None while the vector store has no
+        index loaded.
+        
+        Includes the index size so answers are recomputed once documents
+        are added to the knowledge base.
+        """
+        index = self.vector_store.index
+        if index is None:
+            return None
+        digest = hashlib.sha256(query.encode("utf-8")).hexdigest()
+        return (
+            f"rag:{model or settings.default_model}:{k}:{score_threshold}:"
+            f"{index.ntotal}:{digest}"
+        )
+    
+    async def _run_rag_query(
+        self,
+        query: str,
+        k: int,
+        score_threshold: float,
+        model: Optional[str]
+    ) -> Dict[str, any]:
+        """
+        Retrieve relevant documents and generate a response.
+        
+        Single Responsibility: Uncached RAG pipeline
+        """
         try:
             # Step 1: Retrieve relevant documents
             documents = await self.vector_store.similarity_search(
@@ -49,11 +110,11 @@ class RAGService:
                 }
             
             # Step 2: Prepare context from retrieved documents
-            context_parts = []
-            for i, doc in enumerate(documents, 1):
-                context_parts.append(f"Source {i}: {doc['content']}")
-            
-            context = "\n\n".join(context_parts)
+            format_source = CONTEXT_SOURCE_TEMPLATE.format
+            context = "\n\n".join([
+                format_source(i, doc["content"])
+                for i, doc in enumerate(documents, 1)
+            ])
             
             # Step 3: Generate response with context
             response = await self.llm_service.generate_response(
@@ -3,15 +3,30 @@ FAISS vector store implementation for RAG
 Reference: https://faiss.ai/index.html
 """
 
+import asyncio
 import faiss
+import hashlib
+import time
 import numpy as np
 from typing import List, Dict, Optional
-import pickle
 import os
 from pathlib import Path
 from sentence_transformers import SentenceTransformer
+from starlette.concurrency import run_in_threadpool
 
 from app.shared.config import settings
+from app.shared.cache import cache_manager
+from app.rag.docstore import DocumentStore
+
+# HNSW vector storage: float16 / 8-bit scalar quantization, or full float32
+_HNSW_SCALAR_QUANTIZERS = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "8bit": faiss.ScalarQuantizer.QT_8bit,
+}
+
+# k-means in IVF/PQ training wants ~39 points per centroid; below this many
+# vectors the store searches an exact flat index instead.
+_IVF_TRAINING_POINTS_PER_LIST = 39
 
 
 class FAISSVectorStore:
@@ -23,17 +38,65 @@ class FAISSVectorStore:
     
     def __init__(self, embedding_model: str = None, index_path: str = None):
         self.embedding_model_name = embedding_model or settings.embedding_model
-        self.embedding_model = SentenceTransformer(self.embedding_model_name)
-        self.dimension = self.embedding_model.get_sentence_embedding_dimension()
         self.index_path = Path(index_path or settings.faiss_index_path)
+        self.embedding_model: Optional[SentenceTransformer] = None
+        self.dimension: Optional[int] = None
         self.index = None
-        self.document_store = {}
+        self.document_store: Optional[DocumentStore] = None
+        self._gpu_resources = None
+        # Vectors added since the index was last written, and since when
+        self._unsaved_vectors = 0
+        self._dirty_since: Optional[float] = None
+        # Serializes index mutation with background saves
+        self._index_lock = asyncio.Lock()
+        self._autosave_task: Optional[asyncio.Task] = None
+    
+    def initialize(self):
+        """
+        Load the embedding model and the index.
+        
+        Called once from the application lifespan rather than at import, so
+        importing the app does not pay for model loading.
+        
+        Single Responsibility: Vector store startup
+        """
+        if self.embedding_model is not None:
+            return
+        self.embedding_model = self._load_embedding_model()
+        self.dimension = self.embedding_model.get_sentence_embedding_dimension()
         
         # Ensure index directory exists
-        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.index_path.mkdir(parents=True, exist_ok=True)
+        self.document_store = DocumentStore(self.index_path / "documents.db")
         
         # Load existing index or create new one
         self._initialize_index()
+        self._restore_missing_vectors()
+    
+    def _load_embedding_model(self) -> SentenceTransformer:
+        """
+        Load the embedding model on the configured device.
+        
+        On CUDA the weights are cast to float16. torch.compile is opt-in: its
+        first calls are slow while kernels compile for each input shape.
+        
+        Single Responsibility: Embedding model loading
+        """
+        model = SentenceTransformer(
+            self.embedding_model_name, device=settings.embedding_device
+        )
+        if model.device.type == "cuda" and settings.embedding_fp16:
+            model.half()
+        if settings.embedding_compile:
+            import torch
+            
+            transformer = model[0]
+            if hasattr(transformer, "auto_model"):
+                transformer.auto_model = torch.compile(
+                    transformer.auto_model, dynamic=True
+                )
+        print(f"Loaded embedding model {self.embedding_model_name} on {model.device}")
+        return model
     
     def _initialize_index(self):
         """
@@ -42,13 +105,19 @@ class FAISSVectorStore:
         Single Responsibility: Index initialization
         """
         index_file = self.index_path / "faiss.index"
-        docs_file = self.index_path / "documents.pkl"
         
-        if index_file.exists() and docs_file.exists():
+        if index_file.exists():
             try:
-                self.index = faiss.read_index(str(index_file))
-                with open(docs_file, 'rb') as f:
-                    self.document_store = pickle.load(f)
+                index = faiss.read_index(str(index_file))
+                self.document_store.import_pickle(self.index_path / "documents.pkl")
+                if index.metric_type != faiss.METRIC_INNER_PRODUCT:
+                    print(
+                        "Warning: loaded FAISS index uses L2 distance; "
+                        "rebuild it so scores are cosine similarities"
+                    )
+                if isinstance(index, faiss.IndexIVF):
+                    index.nprobe = settings.faiss_nprobe
+                self.index = self._to_device(index)
                 print(f"Loaded existing FAISS index with {self.index.ntotal} vectors")
             except Exception as e:
                 print(f"Failed to load existing index: {e}")
@@ -60,14 +129,150 @@ class FAISSVectorStore:
         """
         Create new FAISS index.
         
+        Index types that need training (IVF-PQ, 8-bit HNSW storage) start
+        as an exact flat index and are built once enough vectors exist to
+        train on (see _build_trained_index).
+        
         Single Responsibility: New index creation
         """
-        # Use HNSW for better performance with moderate datasets
-        self.index = faiss.IndexHNSWFlat(self.dimension, 32)
-        self.index.hnsw.efConstruction = 200
-        self.index.hnsw.efSearch = 100
-        self.document_store = {}
-        print("Created new FAISS HNSW index")
+        if self._training_threshold() is not None:
+            index = faiss.IndexFlatIP(self.dimension)
+            print("Created new FAISS flat index")
+        else:
+            index = self._build_hnsw_index()
+            print("Created new FAISS HNSW index")
+        self.index = self._to_device(index)
+    
+    def _build_hnsw_index(self):
+        """Build an empty HNSW index with the configured vector storage."""
+        qtype = _HNSW_SCALAR_QUANTIZERS.get(settings.faiss_hnsw_storage)
+        if qtype is None:
+            index = faiss.IndexHNSWFlat(self.dimension, 32, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexHNSWSQ(
+                self.dimension, qtype, 32, faiss.METRIC_INNER_PRODUCT
+            )
+        index.hnsw.efConstruction = 200
+        index.hnsw.efSearch = 100
+        return index
+    
+    def _restore_missing_vectors(self):
+        """
+        Re-embed stored documents that the index on disk does not cover.
+        
+        Documents are written as they are added but the index only on save,
+        so after a crash (or with no index file at all) the document store
+        can hold rows past ``index.ntotal``. They are embedded again and
+        appended, keeping vector positions equal to document ids.
+        
+        Single Responsibility: Index recovery from the document store
+        """
+        start_id = self.index.ntotal
+        rows = self.document_store.get_from(start_id)
+        if not rows:
+            return
+        expected_ids = range(start_id, start_id + len(rows))
+        if [doc_id for doc_id, _ in rows] != list(expected_ids):
+            raise RuntimeError(
+                f"Document store ids do not continue the FAISS index at {start_id}; "
+                "rebuild the index from the source documents"
+            )
+        
+        embeddings = self.embedding_model.encode(
+            [content for _, content in rows],
+            batch_size=64,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        ).astype(np.float32, copy=False)
+        self.index.add(embeddings)
+        flat_index = self._flat_index_ready_to_train()
+        if flat_index is not None:
+            self.index = self._to_device(self._build_trained_index(flat_index))
+        self.save_index()
+        print(f"Re-embedded {len(rows)} documents missing from the FAISS index")
+    
+    def _training_threshold(self) -> Optional[int]:
+        """
+        Vectors needed before the configured index can be trained, or None
+        when it needs no training.
+        
+        8-bit storage learns per-dimension value ranges, so training it on a
+        small first batch would clip every later vector.
+        """
+        if settings.faiss_index_type == "ivfpq":
+            # The PQ codebooks (8 bits each) need at least 256 points as well
+            return max(settings.faiss_nlist * _IVF_TRAINING_POINTS_PER_LIST, 256)
+        if settings.faiss_hnsw_storage == "8bit":
+            return settings.faiss_sq_training_points
+        return None
+    
+    def _flat_index_ready_to_train(self):
+        """
+        Return a host copy of the flat bootstrap index once it holds enough
+        vectors to train the configured index, otherwise None.
+        """
+        threshold = self._training_threshold()
+        if threshold is None or self.index.ntotal < threshold:
+            return None
+        is_flat = isinstance(self.index, faiss.IndexFlat) or (
+            hasattr(faiss, "GpuIndexFlat") and isinstance(self.index, faiss.GpuIndexFlat)
+        )
+        if not is_flat:
+            return None
+        return self._to_host(self.index)
+    
+    def _build_trained_index(self, flat_index):
+        """
+        Build the configured index from the vectors of the flat bootstrap.
+        
+        Vectors keep their positions, so document ids still match. Training
+        and the full re-add take seconds, so callers on the event loop run
+        this in a worker thread.
+        
+        Single Responsibility: Quantized index training
+        """
+        vectors = flat_index.reconstruct_n(0, flat_index.ntotal)
+        if settings.faiss_index_type == "ivfpq":
+            quantizer = faiss.IndexFlatIP(self.dimension)
+            index = faiss.IndexIVFPQ(
+                quantizer,
+                self.dimension,
+                settings.faiss_nlist,
+                settings.faiss_pq_m,
+                8,
+                faiss.METRIC_INNER_PRODUCT,
+            )
+            index.nprobe = settings.faiss_nprobe
+        else:
+            index = self._build_hnsw_index()
+        index.train(vectors)
+        index.add(vectors)
+        print(f"Trained FAISS {type(index).__name__} on {len(vectors)} vectors")
+        return index
+    
+    def _to_device(self, index):
+        """
+        Move an index to the GPU when enabled and supported.
+        
+        Single Responsibility: Index placement
+        """
+        if (
+            not settings.faiss_use_gpu
+            or not hasattr(faiss, "StandardGpuResources")
+            or faiss.get_num_gpus() == 0
+            or isinstance(index, faiss.IndexHNSW)  # no GPU implementation
+        ):
+            return index
+        if self._gpu_resources is None:
+            self._gpu_resources = faiss.StandardGpuResources()
+        return faiss.index_cpu_to_gpu(self._gpu_resources, 0, index)
+    
+    def _to_host(self, index):
+        """Return a CPU copy of an index that may live on the GPU."""
+        if hasattr(faiss, "GpuIndex") and isinstance(index, faiss.GpuIndex):
+            return faiss.index_gpu_to_cpu(index)
+        return index
     
     async def add_documents(self, documents: List[Dict[str, str]]) -> bool:
         """
@@ -81,37 +286,34 @@ class FAISSVectorStore:
             
             # Extract texts for embedding
             texts = [doc["content"] for doc in documents]
+            embeddings_array = await self._embed_documents(texts)
             
-            # Generate embeddings in batches for memory efficiency
-            batch_size = 32
-            embeddings = []
-            
-            for i in range(0, len(texts), batch_size):
-                batch_texts = texts[i:i+batch_size]
-                batch_embeddings = self.embedding_model.encode(
-                    batch_texts,
-                    batch_size=min(batch_size, len(batch_texts)),
-                    show_progress_bar=True
+            async with self._index_lock:
+                start_idx = self.index.ntotal
+                self.index.add(embeddings_array)
+                
+                # Store document metadata
+                self.document_store.add_many(
+                    (start_idx + i, doc["content"], doc.get("metadata", {}))
+                    for i, doc in enumerate(documents)
                 )
-                embeddings.extend(batch_embeddings)
-            
-            # Convert to numpy array and normalize
-            embeddings_array = np.array(embeddings).astype(np.float32)
-            faiss.normalize_L2(embeddings_array)
-            
-            # Add to index
-            start_idx = self.index.ntotal
-            self.index.add(embeddings_array)
-            
-            # Store document metadata
-            for i, doc in enumerate(documents):
-                self.document_store[start_idx + i] = {
-                    'content': doc["content"],
-                    'metadata': doc.get("metadata", {})
-                }
-            
-            # Save index
-            self.save_index()
+                
+                # Train off the event loop; searches keep using the flat
+                # index until the trained one is swapped in
+                flat_index = self._flat_index_ready_to_train()
+                if flat_index is not None:
+                    try:
+                        trained = await run_in_threadpool(
+                            self._build_trained_index, flat_index
+                        )
+                        self.index = self._to_device(trained)
+                    except Exception as e:
+                        print(f"FAISS index training failed, keeping flat index: {e}")
+                
+                self._unsaved_vectors += len(documents)
+                if self._dirty_since is None:
+                    self._dirty_since = time.monotonic()
+                await self._maybe_save()
             
             print(f"Added {len(documents)} documents to vector store")
             return True
@@ -120,6 +322,113 @@ class FAISSVectorStore:
             print(f"Error adding documents to vector store: {e}")
             return False
     
+    async def _embed_documents(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts, reusing cached vectors for content seen before.
+        
+        Vectors are cached in Redis as float16 under a hash of the text, so
+        re-ingesting unchanged chunks skips the embedding model entirely.
+        Repeated texts within the batch (page headers, footers) are looked up
+        and embedded once, then copied to each position.
+        
+        Single Responsibility: Cached document embedding
+        """
+        all_keys = [self._embedding_cache_key(text) for text in texts]
+        unique_texts: Dict[str, str] = {}
+        for key, text in zip(all_keys, texts, strict=True):
+            unique_texts.setdefault(key, text)
+        keys = list(unique_texts)
+        texts = list(unique_texts.values())
+        
+        try:
+            cached = await cache_manager.get_many_raw(keys)
+        except Exception as e:
+            print(f"Embedding cache unavailable: {e}")
+            cached = [None] * len(texts)
+        
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        hits = []
+        misses = []
+        for i, value in enumerate(cached):
+            if value is not None and len(value) == self.dimension * 2:
+                embeddings[i] = np.frombuffer(value, dtype=np.float16)
+                hits.append(i)
+            else:
+                misses.append(i)
+        
+        if hits:
+            # Cached vectors lose a little precision in float16
+            hit_array = embeddings[hits]
+            faiss.normalize_L2(hit_array)
+            embeddings[hits] = hit_array
+        
+        if misses:
+            # One encode call; the model handles batching and normalization
+            fresh_array = self.embedding_model.encode(
+                [texts[i] for i in misses],
+                batch_size=64,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            ).astype(np.float32, copy=False)
+            embeddings[misses] = fresh_array
+            
+            try:
+                await cache_manager.set_many_raw(
+                    {
+                        keys[i]: fresh_array[j].astype(np.float16).tobytes()
+                        for j, i in enumerate(misses)
+                    },
+                    expire=settings.embedding_cache_ttl,
+                )
+            except Exception as e:
+                print(f"Failed to cache embeddings: {e}")
+        
+        if len(keys) == len(all_keys):
+            return embeddings
+        position = {key: i for i, key in enumerate(keys)}
+        return embeddings[[position[key] for key in all_keys]]
+    
+    async def _embed_query(self, query: str) -> np.ndarray:
+        """
+        Embed a search query, reusing the cached vector for repeated queries.
+        
+        Single Responsibility: Cached query embedding
+        """
+        key = self._embedding_cache_key(query, prefix="q")
+        try:
+            cached = await cache_manager.get_raw(key)
+        except Exception as e:
+            print(f"Query embedding cache unavailable: {e}")
+            cached = None
+        
+        if cached is not None and len(cached) == self.dimension * 2:
+            query_embedding = np.frombuffer(cached, dtype=np.float16)
+            query_embedding = query_embedding.astype(np.float32).reshape(1, -1)
+            faiss.normalize_L2(query_embedding)
+        else:
+            query_embedding = self.embedding_model.encode(
+                [query],
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            ).astype(np.float32, copy=False)
+            try:
+                await cache_manager.set_raw(
+                    key,
+                    query_embedding[0].astype(np.float16).tobytes(),
+                    expire=settings.embedding_cache_ttl,
+                )
+            except Exception as e:
+                print(f"Failed to cache query embedding: {e}")
+        
+        return query_embedding
+    
+    def _embedding_cache_key(self, text: str, prefix: str = "emb") -> str:
+        """Cache key for a text's embedding under the current model."""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{prefix}:{self.embedding_model_name}:{digest}"
+    
     async def similarity_search(
         self, 
         query: str, 
@@ -135,14 +444,15 @@ class FAISSVectorStore:
             if self.index.ntotal == 0:
                 return []
             
-            # Generate query embedding
-            query_embedding = self.embedding_model.encode([query])
-            query_embedding = query_embedding.astype(np.float32)
-            faiss.normalize_L2(query_embedding)
+            query_embedding = await self._embed_query(query)
             
             # Search
             scores, indices = self.index.search(query_embedding, k)
             
+            documents = self.document_store.get_many(
+                [int(idx) for idx in indices[0] if idx != -1]
+            )
+            
             # Format results
             results = []
             for score, idx in zip(scores[0], indices[0]):
@@ -152,10 +462,11 @@ class FAISSVectorStore:
                 if score_threshold and score < score_threshold:
                     continue
                 
-                if idx in self.document_store:
+                document = documents.get(int(idx))
+                if document is not None:
                     result = {
-                        'content': self.document_store[idx]['content'],
-                        'metadata': self.document_store[idx]['metadata'],
+                        'content': document['content'],
+                        'metadata': document['metadata'],
                         'similarity_score': float(score)
                     }
                     results.append(result)
@@ -166,21 +477,79 @@ class FAISSVectorStore:
             print(f"Error during similarity search: {e}")
             return []
     
+    def _save_due(self) -> bool:
+        """Whether enough vectors or time have accumulated to write the index."""
+        if self._dirty_since is None:
+            return False
+        return (
+            self._unsaved_vectors >= settings.faiss_save_every_vectors
+            or time.monotonic() - self._dirty_since >= settings.faiss_save_interval
+        )
+    
+    async def _maybe_save(self):
+        """
+        Write the index once enough vectors or time have accumulated.
+        
+        Coalesces bursts of small adds into one full index write, done in a
+        worker thread. Callers hold the index lock.
+        
+        Single Responsibility: Save debouncing
+        """
+        if self._save_due():
+            await run_in_threadpool(self.save_index)
+    
+    async def _autosave(self):
+        """
+        Check the save interval in the background.
+        
+        Without this an index that stops receiving documents would stay
+        unsaved until shutdown, and a crash would lose its recent vectors.
+        
+        Single Responsibility: Periodic index persistence
+        """
+        while True:
+            await asyncio.sleep(settings.faiss_save_interval)
+            try:
+                async with self._index_lock:
+                    await self._maybe_save()
+            except Exception as e:
+                print(f"Background FAISS index save failed: {e}")
+    
+    async def start_autosave(self):
+        """Start the periodic background save."""
+        if self._autosave_task is None:
+            self._autosave_task = asyncio.create_task(self._autosave())
+    
+    async def stop_autosave(self):
+        """Stop the periodic background save."""
+        if self._autosave_task is None:
+            return
+        self._autosave_task.cancel()
+        try:
+            await self._autosave_task
+        except asyncio.CancelledError:
+            pass
+        self._autosave_task = None
+    
+    def flush(self):
+        """Write the index if it has unsaved changes."""
+        if self._dirty_since is not None:
+            self.save_index()
+    
     def save_index(self):
         """
-        Save index and document store to disk.
+        Save index to disk.
+        
+        Documents are written to the document store as they are added, so
+        only the FAISS index needs persisting here.
         
         Single Responsibility: Index persistence
         """
         try:
             index_file = self.index_path / "faiss.index"
-            docs_file = self.index_path / "documents.pkl"
-            
-            faiss.write_index(self.index, str(index_file))
-            
-            with open(docs_file, 'wb') as f:
-                pickle.dump(self.document_store, f)
-                
+            faiss.write_index(self._to_host(self.index), str(index_file))
+            self._unsaved_vectors = 0
+            self._dirty_since = None
             print("FAISS index saved successfully")
             
         except Exception as e:
@@ -194,7 +563,7 @@ class FAISSVectorStore:
         """
         return {
             "total_vectors": self.index.ntotal if self.index else 0,
-            "total_documents": len(self.document_store),
+            "total_documents": self.document_store.count() if self.document_store else 0,
             "dimension": self.dimension
         }
 
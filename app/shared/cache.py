@@ -4,8 +4,8 @@ Reference: https://redis.io/docs/connect/clients/python/
 """
 
 import redis.asyncio as redis
-from typing import Optional, Any
-import json
+from typing import Optional, Any, Dict, List
+import orjson
 from app.shared.config import settings
 
 
@@ -16,18 +16,36 @@ class CacheManager:
     Single Responsibility: Cache operations management
     """
     
-    def __init__(self, redis_url: str):
+    def __init__(self, redis_url: str, max_connections: int = 64):
         self.redis_url = redis_url
+        self.max_connections = max_connections
+        self._pool: Optional[redis.ConnectionPool] = None
         self._redis: Optional[redis.Redis] = None
     
     async def connect(self):
-        """Establish Redis connection."""
-        self._redis = redis.from_url(self.redis_url, decode_responses=True)
+        """Establish a bounded Redis connection pool."""
+        # Raw bytes are returned so binary values (e.g. packed vectors) round-trip
+        self._pool = redis.ConnectionPool.from_url(
+            self.redis_url,
+            max_connections=self.max_connections,
+            decode_responses=False,
+        )
+        self._redis = redis.Redis(connection_pool=self._pool)
     
     async def disconnect(self):
-        """Close Redis connection."""
+        """
+        Close the client and the connection pool it was given.
+
+        A client built on an explicit pool does not own it, so closing the
+        client alone would leave the pooled connections open.
+        """
         if self._redis:
-            await self._redis.close()
+            try:
+                await self._redis.aclose()
+            finally:
+                await self._pool.aclose()
+                self._redis = None
+                self._pool = None
     
     async def set(self, key: str, value: Any, expire: int = 3600):
         """
@@ -38,7 +56,10 @@ class CacheManager:
         if not self._redis:
             await self.connect()
         
-        serialized_value = json.dumps(value) if not isinstance(value, str) else value
+        if isinstance(value, (str, bytes)):
+            serialized_value = value
+        else:
+            serialized_value = orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
         await self._redis.set(key, serialized_value, ex=expire)
     
     async def get(self, key: str) -> Optional[Any]:
@@ -53,11 +74,62 @@ class CacheManager:
         value = await self._redis.get(key)
         if value:
             try:
-                return json.loads(value)
-            except json.JSONDecodeError:
-                return value
+                return orjson.loads(value)
+            except orjson.JSONDecodeError:
+                return value.decode("utf-8", errors="replace")
         return None
     
+    async def get_raw(self, key: str) -> Optional[bytes]:
+        """
+        Get a raw byte value without JSON decoding.
+        
+        Single Responsibility: Binary value retrieval
+        """
+        if not self._redis:
+            await self.connect()
+        
+        return await self._redis.get(key)
+    
+    async def set_raw(self, key: str, value: bytes, expire: int = 3600):
+        """
+        Set a raw byte value with expiration.
+        
+        Single Responsibility: Binary value storage
+        """
+        if not self._redis:
+            await self.connect()
+        
+        await self._redis.set(key, value, ex=expire)
+    
+    async def get_many_raw(self, keys: List[str]) -> List[Optional[bytes]]:
+        """
+        Get several raw byte values in one round-trip.
+        
+        Single Responsibility: Bulk binary value retrieval
+        """
+        if not self._redis:
+            await self.connect()
+        
+        if not keys:
+            return []
+        return await self._redis.mget(keys)
+    
+    async def set_many_raw(self, mapping: Dict[str, bytes], expire: int = 3600):
+        """
+        Set several raw byte values with expiration in one round-trip.
+        
+        Single Responsibility: Bulk binary value storage
+        """
+        if not self._redis:
+            await self.connect()
+        
+        if not mapping:
+            return
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, ex=expire)
+            await pipe.execute()
+    
     async def delete(self, key: str):
         """
         Delete a value from cache.
@@ -71,4 +143,4 @@ class CacheManager:
 
 
 # Global cache manager instance
-cache_manager = CacheManager(settings.redis_url)
+cache_manager = CacheManager(settings.redis_url, settings.redis_max_connections)
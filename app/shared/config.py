@@ -21,17 +21,30 @@ class Settings(BaseSettings):
     version: str = "1.0.0"
     environment: str = "development"
     debug: bool = False
+    # Chat rooms, caches and the vector store live in process memory, so
+    # more than one worker splits them; raise only with shared backends.
+    server_workers: int = 1
     
     # Security settings
     secret_key: str = "your-secret-key-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    password_hash_workers: int = os.cpu_count() or 1
     
     # Database settings
     database_url: str = "sqlite+aiosqlite:///./app.db"
+    db_pool_size: int = 20
+    db_max_overflow: int = 40
+    db_pool_recycle: int = 1800  # seconds
+    db_statement_cache_size: int = 512  # asyncpg only
+    message_write_batch_size: int = 100
+    message_write_interval: float = 0.02  # seconds
+    message_write_max_attempts: int = 5
+    message_write_retry_backoff: float = 0.5  # seconds, doubled per retry
     
     # Redis settings
     redis_url: str = "redis://localhost:6379/0"
+    redis_max_connections: int = 64
     
     # LLM settings
     ollama_url: str = "http://localhost:11434"
@@ -40,10 +53,27 @@ class Settings(BaseSettings):
     # File upload settings
     max_file_size: int = 10 * 1024 * 1024  # 10MB
     upload_dir: str = "uploads"
+    pdf_backend: str = "pymupdf"  # "pymupdf", "pdfium" or "markdown"
+    pdf_workers: int = os.cpu_count() or 1
+    pdf_parallel_min_pages: int = 64
     
     # Vector store settings
     faiss_index_path: str = "data/faiss_index"
     embedding_model: str = "all-mpnet-base-v2"
+    embedding_device: Optional[str] = None  # e.g. "cuda"; auto-detected if unset
+    embedding_fp16: bool = True  # applies on CUDA only
+    embedding_compile: bool = False
+    faiss_index_type: str = "hnsw"  # "hnsw" or "ivfpq"
+    faiss_hnsw_storage: str = "fp16"  # "fp16", "8bit" or "flat"
+    faiss_sq_training_points: int = 10000  # vectors needed before 8-bit training
+    faiss_nlist: int = 256
+    faiss_pq_m: int = 64  # must divide the embedding dimension
+    faiss_nprobe: int = 16
+    faiss_use_gpu: bool = False
+    faiss_save_every_vectors: int = 500
+    faiss_save_interval: float = 30.0  # seconds
+    embedding_cache_ttl: int = 30 * 24 * 3600  # 30 days
+    rag_answer_cache_ttl: int = 3600  # 1 hour
     
     class Config:
         env_file = ".env"
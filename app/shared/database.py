@@ -61,15 +61,54 @@ class DatabaseSessionManager:
             await session.close()
 
     async def init_db(self):
-        """Initialize database tables."""
+        """Initialize database tables and any indexes they are missing."""
         async with self._engine.begin() as conn:
             await conn.run_sync(SQLModel.metadata.create_all)
+            await conn.run_sync(_create_missing_indexes)
+
+
+def _create_missing_indexes(connection):
+    """
+    Create indexes added to models after their table already existed.
+    
+    ``create_all`` skips existing tables entirely, so new indexes on them
+    would otherwise never be built.
+    """
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def _engine_kwargs(database_url: str) -> dict:
+    """
+    Engine options for the configured database.
+    
+    Single Responsibility: Connection pool configuration
+    """
+    engine_kwargs = {"echo": settings.debug, "pool_pre_ping": True}
+    
+    # SQLite engines use NullPool or a single shared connection; only
+    # server databases get a queue pool to size
+    if not database_url.startswith("sqlite"):
+        engine_kwargs.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    
+    # Reuse prepared statements across requests on each asyncpg connection
+    if database_url.startswith("postgresql+asyncpg"):
+        engine_kwargs["connect_args"] = {
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+        }
+    
+    return engine_kwargs
 
 
 # Global session manager instance
 sessionmanager = DatabaseSessionManager(
     settings.database_url,
-    {"echo": settings.debug, "pool_pre_ping": True}
+    _engine_kwargs(settings.database_url)
 )
 
 
@@ -3,14 +3,18 @@ Custom exception classes and error handlers
 Reference: https://fastapi.tiangolo.com/tutorial/handling-errors/
 """
 
-from fastapi import HTTPException, Request, status
-from fastapi.responses import JSONResponse
-from fastapi.templating import Jinja2Templates
+from typing import Any, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse as _JSON
 import logging
 
-templates = Jinja2Templates(directory="app/templates")
 logger = logging.getLogger(__name__)
 
+# Requests under this path get JSON errors, everything else an HTML page
+_API_PREFIX = "/api/"
+_API_PREFIX_BYTES = _API_PREFIX.encode()
+
 
 class BaseAppException(Exception):
     """
@@ -103,30 +107,57 @@ class VectorStoreError(BaseAppException):
 
 
 # Error handlers
+def _json_error(
+    status_code: int, detail: Any, type_name: Optional[str] = None
+) -> Response:
+    """
+    Build a JSON error response serialized with orjson.
+    
+    Single Responsibility: API error response construction
+    """
+    content = {"detail": detail}
+    if type_name is not None:
+        content["type"] = type_name
+    return _JSON(status_code=status_code, content=content)
+
+
+def _is_api_request(request: Request) -> bool:
+    """Check the API prefix on the raw path bytes, falling back to the str path."""
+    raw_path = request.scope.get("raw_path")
+    if raw_path is None:
+        return request.scope["path"].startswith(_API_PREFIX)
+    return raw_path.startswith(_API_PREFIX_BYTES)
+
+
+def _error_page(request: Request, status_code: int, message: Any) -> Response:
+    """
+    Render the HTML error page.
+    
+    Single Responsibility: Web error response construction
+    """
+    return request.app.state.templates.TemplateResponse(
+        "errors/error.html",
+        {
+            "request": request,
+            "status_code": status_code,
+            "message": message
+        },
+        status_code=status_code
+    )
+
+
 async def app_exception_handler(request: Request, exc: BaseAppException):
     """
     Handler for application-specific exceptions.
     
     Single Responsibility: Application exception handling
     """
-    logger.error(f"Application error: {exc.message}")
+    logger.error("Application error: %s", exc.message)
     
     # Return JSON for API requests, HTML for web requests
-    if request.url.path.startswith("/api/"):
-        return JSONResponse(
-            status_code=exc.status_code,
-            content={"detail": exc.message, "type": type(exc).__name__}
-        )
-    else:
-        return templates.TemplateResponse(
-            "errors/error.html",
-            {
-                "request": request,
-                "status_code": exc.status_code,
-                "message": exc.message
-            },
-            status_code=exc.status_code
-        )
+    if _is_api_request(request):
+        return _json_error(exc.status_code, exc.message, type(exc).__name__)
+    return _error_page(request, exc.status_code, exc.message)
 
 
 async def http_exception_handler(request: Request, exc: HTTPException):
@@ -135,23 +166,11 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     
     Single Responsibility: HTTP exception handling
     """
-    logger.warning(f"HTTP error {exc.status_code}: {exc.detail}")
-    
-    if request.url.path.startswith("/api/"):
-        return JSONResponse(
-            status_code=exc.status_code,
-            content={"detail": exc.detail}
-        )
-    else:
-        return templates.TemplateResponse(
-            "errors/error.html",
-            {
-                "request": request,
-                "status_code": exc.status_code,
-                "message": exc.detail
-            },
-            status_code=exc.status_code
-        )
+    logger.warning("HTTP error %s: %s", exc.status_code, exc.detail)
+    
+    if _is_api_request(request):
+        return _json_error(exc.status_code, exc.detail)
+    return _error_page(request, exc.status_code, exc.detail)
 
 
 async def general_exception_handler(request: Request, exc: Exception):
@@ -160,21 +179,8 @@ async def general_exception_handler(request: Request, exc: Exception):
     
     Single Responsibility: General exception handling
     """
-    logger.error(f"Unexpected error: {str(exc)}", exc_info=True)
-    
-    if request.url.path.startswith("/api/"):
-        return JSONResponse(
-            status_code=500,
-            content={"detail": "Internal server error"}
-        )
-    else:
-        return templates.TemplateResponse(
-            "errors/error.html",
-            {
-                "request": request,
-                "status_code": 500,
-                "message": "An unexpected error occurred"
-            },
-            status_code=500
-        )
-
+    logger.error("Unexpected error: %s", exc, exc_info=True)
+    
+    if _is_api_request(request):
+        return _json_error(500, "Internal server error")
+    return _error_page(request, 500, "An unexpected error occurred")
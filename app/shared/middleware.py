@@ -3,15 +3,20 @@ Custom middleware for FastAPI application
 Reference: https://fastapi.tiangolo.com/tutorial/middleware/
 """
 
+import base64
+import hashlib
+import hmac
+import math
+import socket
 import time
 import logging
-from typing import Callable
-from fastapi import Request, Response, HTTPException
-from fastapi.middleware.base import BaseHTTPMiddleware
+from typing import Dict, List, Optional, Tuple
+import orjson
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from itsdangerous.exc import BadSignature, SignatureExpired
 from starlette.middleware.sessions import SessionMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.shared.config import settings
 
@@ -22,129 +27,282 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# High-volume paths passed through without timing or logging
+_UNLOGGED_PATH_PREFIXES = (
+    "/static/", "/health", "/api/health", "/metrics", "/favicon.ico"
+)
+
+# Rate limit keys: ::ffff:a.b.c.d counts as IPv4, IPv6 /48 prefixes are tagged
+_IPV4_MAPPED_PREFIX = b"\x00" * 10 + b"\xff\xff"
+_IPV6_KEY_TAG = 1 << 48
+
+# Body of every 429 response, serialized once
+_RATE_LIMIT_BODY = orjson.dumps({"detail": "Rate limit exceeded"})
+
+# Security headers as raw ASGI header tuples, encoded once at import
+_SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"permissions-policy", b"geolocation=(), microphone=(), camera=()"),
+]
+
+_CSP_HEADER = (
+    b"content-security-policy",
+    b"default-src 'self'; "
+    b"script-src 'self' 'unsafe-inline' https://unpkg.com; "
+    b"style-src 'self' 'unsafe-inline'; "
+    b"img-src 'self' data: https:; "
+    b"connect-src 'self' ws: wss:; "
+    b"font-src 'self'; "
+    b"object-src 'none'; "
+    b"base-uri 'self'; "
+    b"form-action 'self';",
+)
+
+
+def _security_headers(environment: str) -> List[Tuple[bytes, bytes]]:
+    """Return the security headers for the environment, with CSP in production."""
+    if environment == "production":
+        return [*_SECURITY_HEADERS, _CSP_HEADER]
+    return list(_SECURITY_HEADERS)
 
-class LoggingMiddleware(BaseHTTPMiddleware):
+
+class _ClientRateLimiter:
     """
-    Middleware for request/response logging and performance monitoring.
+    Token bucket per client that refills at ``calls / period`` tokens per
+    second, so each request does constant work.
+    
+    Buckets are split into shards only so idle-bucket cleanup can be done
+    a shard at a time; a single event loop gains nothing from sharding the
+    lookups themselves. IPv6 clients share a bucket per /48 so one routed
+    block counts as a single client.
     
-    Single Responsibility: Request lifecycle logging
+    Single Responsibility: Rate limit bookkeeping
     """
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        start_time = time.time()
-        
-        # Log request
-        logger.info(
-            f"Request: {request.method} {request.url.path} "
-            f"from {request.client.host if request.client else 'unknown'}"
+    SHARD_COUNT = 64
+    
+    def __init__(self, calls: int, period: int):
+        self.calls = calls
+        self.period = period
+        self.refill_rate = calls / period
+        # A denied client gets its next token within period / calls seconds
+        self.retry_after = str(math.ceil(period / calls))
+        self._reject_headers = (
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(_RATE_LIMIT_BODY)).encode()),
+            (b"retry-after", self.retry_after.encode()),
+        )
+        # client key -> (tokens, last refill time), sharded by hash
+        self.shards: Tuple[Dict[int, Tuple[float, float]], ...] = tuple(
+            {} for _ in range(self.SHARD_COUNT)
         )
+        # One shard is swept per interval, so every shard once per period
+        self._gc_interval = period / self.SHARD_COUNT
+        self._gc_shard = 0
+        self._next_gc = 0.0
+    
+    @staticmethod
+    def _client_key(scope: Scope) -> int:
+        """
+        Return the bucket key for the client as an int.
+        
+        IPv4 addresses map to their 32-bit value and IPv6 addresses to their
+        /48 prefix, tagged above bit 48 so the two ranges never overlap.
         
+        Single Responsibility: Client identification
+        """
+        client = scope.get("client")
+        if not client:
+            return -1
+        host = client[0]
         try:
-            response = await call_next(request)
-            
-            # Calculate processing time
-            process_time = time.time() - start_time
-            
-            # Log response
-            logger.info(
-                f"Response: {response.status_code} "
-                f"({process_time:.3f}s) "
-                f"for {request.method} {request.url.path}"
-            )
-            
-            # Add performance header
-            response.headers["X-Process-Time"] = str(process_time)
-            
-            return response
-            
-        except Exception as e:
-            process_time = time.time() - start_time
-            logger.error(
-                f"Error: {str(e)} ({process_time:.3f}s) "
-                f"for {request.method} {request.url.path}"
-            )
-            raise
+            return int.from_bytes(socket.inet_aton(host), "big")
+        except OSError:
+            pass
+        try:
+            packed = socket.inet_pton(socket.AF_INET6, host)
+        except OSError:
+            # Not an IP address, e.g. a test client or unix socket peer
+            return hash(host)
+        if packed[:12] == _IPV4_MAPPED_PREFIX:
+            return int.from_bytes(packed[12:], "big")
+        return _IPV6_KEY_TAG | int.from_bytes(packed[:6], "big")
+    
+    def allow(self, scope: Scope) -> bool:
+        """
+        Take a token for the requesting client; False when none is left.
+        
+        Single Responsibility: Rate limit decision
+        """
+        client_key = self._client_key(scope)
+        buckets = self.shards[hash(client_key) & (self.SHARD_COUNT - 1)]
+        now = time.monotonic()
+        
+        if now >= self._next_gc:
+            self._sweep_shard(now)
+        
+        # Refill the client's bucket and take one token
+        tokens, last = buckets.get(client_key, (self.calls, now))
+        tokens = min(self.calls, tokens + (now - last) * self.refill_rate)
+        
+        if tokens < 1.0:
+            buckets[client_key] = (tokens, now)
+            return False
+        
+        buckets[client_key] = (tokens - 1.0, now)
+        return True
+    
+    def _sweep_shard(self, now: float):
+        """
+        Drop idle buckets from the next shard in turn.
+        
+        Sweeping a single shard bounds the work done by the request that
+        triggers it to about 1/SHARD_COUNT of the tracked clients.
+        """
+        shard = self.shards[self._gc_shard]
+        idle = [key for key, (_, last) in shard.items() if now - last > self.period]
+        for key in idle:
+            del shard[key]
+        self._gc_shard = (self._gc_shard + 1) % self.SHARD_COUNT
+        self._next_gc = now + self._gc_interval
+    
+    async def reject(self, send: Send):
+        """
+        Send the 429 response for a denied request.
+        
+        The headers are encoded once; each denial still sends fresh message
+        dicts and a fresh header list, since outer middleware may edit them.
+        """
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": list(self._reject_headers),
+        })
+        await send({"type": "http.response.body", "body": _RATE_LIMIT_BODY})
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RequestPipelineMiddleware:
     """
-    Simple rate limiting middleware.
+    Rate limiting, request logging and security headers in one middleware.
     
-    Single Responsibility: Request rate limiting
+    Plain ASGI with a single send wrapper and a single rebuild of the
+    response headers, instead of a separate layer for each concern.
+    
+    Single Responsibility: Per-request policy pipeline
     """
     
-    def __init__(self, app, calls: int = 100, period: int = 60):
-        super().__init__(app)
-        self.calls = calls
-        self.period = period
-        self.clients = {}
+    def __init__(
+        self,
+        app: ASGIApp,
+        calls: Optional[int] = None,
+        period: int = 60,
+        environment: str = "development"
+    ):
+        self.app = app
+        self.limiter = _ClientRateLimiter(calls, period) if calls else None
+        self.security_headers = _security_headers(environment)
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        client_ip = request.client.host if request.client else "unknown"
-        current_time = time.time()
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Clean old entries
-        self.clients = {
-            ip: times for ip, times in self.clients.items()
-            if any(t > current_time - self.period for t in times)
-        }
+        security_headers = self.security_headers
+        method = scope["method"]
+        path = scope["path"]
         
-        # Check rate limit
-        if client_ip in self.clients:
-            # Filter recent calls
-            recent_calls = [
-                t for t in self.clients[client_ip]
-                if t > current_time - self.period
-            ]
-            
-            if len(recent_calls) >= self.calls:
-                return JSONResponse(
-                    status_code=429,
-                    content={"detail": "Rate limit exceeded"}
+        # Health checks and static files are neither timed nor logged
+        start_time = None
+        if not path.startswith(_UNLOGGED_PATH_PREFIXES):
+            start_time = time.perf_counter()
+            if logger.isEnabledFor(logging.INFO):
+                client = scope.get("client")
+                logger.info(
+                    "Request: %s %s from %s",
+                    method, path, client[0] if client else "unknown"
                 )
-            
-            self.clients[client_ip] = recent_calls + [current_time]
-        else:
-            self.clients[client_ip] = [current_time]
         
-        return await call_next(request)
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.extend(security_headers)
+                if start_time is not None:
+                    process_time = time.perf_counter() - start_time
+                    logger.info(
+                        "Response: %s (%.3fs) for %s %s",
+                        message["status"], process_time, method, path
+                    )
+                    headers.append((b"x-process-time", b"%.6f" % process_time))
+                message["headers"] = headers
+            await send(message)
+        
+        # Denied requests go through the same wrapper, so 429s are logged
+        # and carry the security headers like any other response
+        if self.limiter is not None and not self.limiter.allow(scope):
+            await self.limiter.reject(send_wrapper)
+            return
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            if start_time is not None:
+                logger.error(
+                    "Error: %s (%.3fs) for %s %s",
+                    e, time.perf_counter() - start_time, method, path
+                )
+            raise
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+class _Blake2bTimestampSigner:
     """
-    Middleware for adding security headers.
+    Drop-in for itsdangerous.TimestampSigner using a keyed BLAKE2b MAC.
     
-    Single Responsibility: Security header management
+    Signed values have the form ``value.timestamp.mac``; failures raise the
+    same itsdangerous exceptions so SessionMiddleware handles them as before.
+    
+    Single Responsibility: Session cookie signing
     """
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        response = await call_next(request)
-        
-        # Add security headers
-        response.headers.update({
-            "X-Content-Type-Options": "nosniff",
-            "X-Frame-Options": "DENY",
-            "X-XSS-Protection": "1; mode=block",
-            "Referrer-Policy": "strict-origin-when-cross-origin",
-            "Permissions-Policy": "geolocation=(), microphone=(), camera=()",
-        })
-        
-        # Add CSP header for production
-        if settings.environment == "production":
-            csp = (
-                "default-src 'self'; "
-                "script-src 'self' 'unsafe-inline' https://unpkg.com; "
-                "style-src 'self' 'unsafe-inline'; "
-                "img-src 'self' data: https:; "
-                "connect-src 'self' ws: wss:; "
-                "font-src 'self'; "
-                "object-src 'none'; "
-                "base-uri 'self'; "
-                "form-action 'self';"
-            )
-            response.headers["Content-Security-Policy"] = csp
+    def __init__(self, secret_key: str):
+        # Derive a fixed-size key; BLAKE2b accepts at most 64 key bytes
+        self._key = hashlib.blake2b(
+            secret_key.encode(), digest_size=32, person=b"session"
+        ).digest()
+    
+    def _mac(self, message: bytes) -> bytes:
+        digest = hashlib.blake2b(message, key=self._key, digest_size=16).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b"=")
+    
+    def sign(self, value: bytes) -> bytes:
+        message = value + b"." + str(int(time.time())).encode()
+        return message + b"." + self._mac(message)
+    
+    def unsign(self, signed_value: bytes, max_age: Optional[int] = None) -> bytes:
+        message, sep, mac = signed_value.rpartition(b".")
+        if not sep or not hmac.compare_digest(mac, self._mac(message)):
+            raise BadSignature("Signature does not match")
         
-        return response
+        value, sep, timestamp = message.rpartition(b".")
+        if not sep or not timestamp.isdigit():
+            raise BadSignature("Malformed timestamp")
+        if max_age is not None and time.time() - int(timestamp) > max_age:
+            raise SignatureExpired("Signature expired")
+        return value
+
+
+class FastSessionMiddleware(SessionMiddleware):
+    """
+    SessionMiddleware that signs cookies with BLAKE2b instead of itsdangerous.
+    
+    Single Responsibility: Session cookie handling
+    """
+    
+    def __init__(self, app: ASGIApp, secret_key: str, **kwargs):
+        super().__init__(app, secret_key=secret_key, **kwargs)
+        self.signer = _Blake2bTimestampSigner(str(secret_key))
 
 
 def setup_middleware(app):
@@ -154,22 +312,20 @@ def setup_middleware(app):
     Single Responsibility: Middleware configuration
     """
     
-    # Security headers (first)
-    app.add_middleware(SecurityHeadersMiddleware)
-    
-    # Rate limiting
-    if settings.environment == "production":
-        app.add_middleware(RateLimitMiddleware, calls=100, period=60)
-    
-    # Request logging
-    app.add_middleware(LoggingMiddleware)
+    # Rate limiting (production only), request logging and security headers
+    app.add_middleware(
+        RequestPipelineMiddleware,
+        calls=100 if settings.environment == "production" else None,
+        period=60,
+        environment=settings.environment
+    )
     
     # Gzip compression
     app.add_middleware(GZipMiddleware, minimum_size=1000)
     
     # Session middleware
     app.add_middleware(
-        SessionMiddleware,
+        FastSessionMiddleware,
         secret_key=settings.secret_key,
         max_age=3600,  # 1 hour
         same_site="lax",
@@ -7,16 +7,10 @@ import logging
 import time
 from typing import Dict, Any, Optional
 from contextlib import asynccontextmanager
-from datetime import datetime
 
+import orjson
 import structlog
-from prometheus_client import Counter, Histogram, Gauge, start_http_server
-from opentelemetry import trace, metrics
-from opentelemetry.exporter.jaeger.thrift import JaegerExporter
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
-from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+from prometheus_client import Counter, Histogram, Gauge
 
 from app.shared.config import settings
 
@@ -56,6 +50,27 @@ VECTOR_STORE_OPERATIONS = Counter(
     ['operation', 'status']
 )
 
+# Labelled children resolved so far, keyed by (metric, label values)
+_METRIC_CHILDREN: Dict[tuple, Any] = {}
+
+
+def _metric_child(metric, *label_values: str):
+    """
+    Return the child of a labelled metric, calling .labels() only once
+    per label combination.
+    """
+    key = (metric, label_values)
+    child = _METRIC_CHILDREN.get(key)
+    if child is None:
+        child = metric.labels(*label_values)
+        _METRIC_CHILDREN[key] = child
+    return child
+
+
+def _orjson_dumps(obj: Any, default=None) -> str:
+    """JSON serializer for structlog; stdlib handlers expect str, not bytes."""
+    return orjson.dumps(obj, default=default).decode()
+
 
 class MonitoringManager:
     """
@@ -74,14 +89,10 @@ class MonitoringManager:
         structlog.configure(
             processors=[
                 structlog.stdlib.filter_by_level,
-                structlog.stdlib.add_logger_name,
                 structlog.stdlib.add_log_level,
-                structlog.stdlib.PositionalArgumentsFormatter(),
-                structlog.processors.TimeStamper(fmt="iso"),
-                structlog.processors.StackInfoRenderer(),
+                structlog.processors.TimeStamper(fmt="iso", utc=True),
                 structlog.processors.format_exc_info,
-                structlog.processors.UnicodeDecoder(),
-                structlog.processors.JSONRenderer()
+                structlog.processors.JSONRenderer(serializer=_orjson_dumps)
             ],
             context_class=dict,
             logger_factory=structlog.stdlib.LoggerFactory(),
@@ -90,25 +101,44 @@ class MonitoringManager:
         )
     
     def setup_tracing(self):
-        """Configure distributed tracing."""
-        if settings.environment == "production":
-            trace.set_tracer_provider(TracerProvider())
-            
-            jaeger_exporter = JaegerExporter(
-                agent_host_name="jaeger",
-                agent_port=6831,
-            )
-            
-            span_processor = BatchSpanProcessor(jaeger_exporter)
-            trace.get_tracer_provider().add_span_processor(span_processor)
+        """
+        Configure distributed tracing.
+        
+        The OpenTelemetry and Jaeger modules are imported only in production,
+        so development and test runs do not pay for loading them.
+        """
+        if settings.environment != "production":
+            return
+        
+        from opentelemetry import trace
+        from opentelemetry.exporter.jaeger.thrift import JaegerExporter
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        
+        trace.set_tracer_provider(TracerProvider())
+        
+        jaeger_exporter = JaegerExporter(
+            agent_host_name="jaeger",
+            agent_port=6831,
+        )
+        
+        span_processor = BatchSpanProcessor(jaeger_exporter)
+        trace.get_tracer_provider().add_span_processor(span_processor)
     
     def setup_metrics(self):
         """Start Prometheus metrics server."""
         if settings.environment == "production":
+            from prometheus_client import start_http_server
             start_http_server(9090)
     
     def instrument_fastapi(self, app):
-        """Instrument FastAPI application."""
+        """Instrument FastAPI application (production only, like tracing)."""
+        if settings.environment != "production":
+            return
+        
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+        from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+        
         FastAPIInstrumentor.instrument_app(app)
         HTTPXClientInstrumentor().instrument()
 
@@ -136,16 +166,8 @@ class PerformanceMonitor:
         finally:
             duration = time.time() - start_time
             
-            REQUEST_COUNT.labels(
-                method=method,
-                endpoint=endpoint,
-                status_code=status_code
-            ).inc()
-            
-            REQUEST_DURATION.labels(
-                method=method,
-                endpoint=endpoint
-            ).observe(duration)
+            _metric_child(REQUEST_COUNT, method, endpoint, status_code).inc()
+            _metric_child(REQUEST_DURATION, method, endpoint).observe(duration)
     
     @staticmethod
     @asynccontextmanager
@@ -163,22 +185,13 @@ class PerformanceMonitor:
         finally:
             duration = time.time() - start_time
             
-            LLM_REQUEST_COUNT.labels(
-                model=model,
-                status=status
-            ).inc()
-            
-            LLM_REQUEST_DURATION.labels(
-                model=model
-            ).observe(duration)
+            _metric_child(LLM_REQUEST_COUNT, model, status).inc()
+            _metric_child(LLM_REQUEST_DURATION, model).observe(duration)
     
     @staticmethod
     def track_vector_operation(operation: str, status: str = "success"):
         """Track vector store operations."""
-        VECTOR_STORE_OPERATIONS.labels(
-            operation=operation,
-            status=status
-        ).inc()
+        _metric_child(VECTOR_STORE_OPERATIONS, operation, status).inc()
     
     @staticmethod
     def update_active_connections(count: int):
@@ -202,8 +215,7 @@ class ApplicationLogger:
             "User action",
             user_id=user_id,
             action=action,
-            details=details or {},
-            timestamp=datetime.utcnow().isoformat()
+            details=details or {}
         )
     
     def log_llm_interaction(
@@ -223,8 +235,7 @@ class ApplicationLogger:
             prompt_length=prompt_length,
             response_length=response_length,
             duration=duration,
-            success=success,
-            timestamp=datetime.utcnow().isoformat()
+            success=success
         )
     
     def log_document_upload(
@@ -242,8 +253,7 @@ class ApplicationLogger:
             filename=filename,
             file_size=file_size,
             chunks_created=chunks_created,
-            success=success,
-            timestamp=datetime.utcnow().isoformat()
+            success=success
         )
     
     def log_security_event(
@@ -259,8 +269,28 @@ class ApplicationLogger:
             event_type=event_type,
             user_id=user_id,
             ip_address=ip_address,
-            details=details or {},
-            timestamp=datetime.utcnow().isoformat()
+            details=details or {}
+        )
+    
+    def log_persistence_failure(
+        self,
+        table: str,
+        rows: int,
+        attempt: int,
+        max_attempts: int,
+        error: str,
+        dropped: bool
+    ):
+        """Log a failed background write; an error once the rows are dropped."""
+        log = self.logger.error if dropped else self.logger.warning
+        log(
+            "Persistence failure",
+            table=table,
+            rows=rows,
+            attempt=attempt,
+            max_attempts=max_attempts,
+            error=error,
+            dropped=dropped
         )
 
 
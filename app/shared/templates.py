@@ -0,0 +1,34 @@
+"""
+Jinja2 template environment held on application state
+Reference: https://fastapi.tiangolo.com/advanced/templates/
+"""
+
+from fastapi import Request
+from fastapi.templating import Jinja2Templates
+
+from app.shared.config import settings
+
+
+def create_templates() -> Jinja2Templates:
+    """
+    Build the application's template environment with every template compiled.
+    
+    Compiled templates are kept in the environment's LRU cache. Outside
+    production, auto_reload re-stats the source on each lookup to pick up edits.
+    
+    Single Responsibility: Template environment construction
+    """
+    templates = Jinja2Templates(directory="app/templates")
+    templates.env.auto_reload = settings.environment != "production"
+    for name in templates.env.list_templates():
+        templates.env.get_template(name)
+    return templates
+
+
+def get_templates(request: Request) -> Jinja2Templates:
+    """
+    Dependency returning the template environment created at startup.
+    
+    Single Responsibility: Provide templates to endpoints
+    """
+    return request.app.state.templates
@@ -0,0 +1,90 @@
+"""
+Custom column types shared by the database models
+Reference: https://docs.sqlalchemy.org/en/20/core/custom_types.html
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import Any, Optional
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import BINARY, TypeDecorator
+
+
+class UUIDType(TypeDecorator):
+    """
+    UUID column stored in 16 bytes on every backend.
+
+    Uses the native ``uuid`` type on PostgreSQL and ``BINARY(16)`` elsewhere,
+    instead of the 32-character hex string used by the generic type.
+
+    Single Responsibility: Compact UUID storage
+    """
+
+    impl = BINARY(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=True))
+        return dialect.type_descriptor(BINARY(16))
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[Any]:
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        if dialect.name == "postgresql":
+            return value
+        return value.bytes
+
+    def process_result_value(self, value: Any, dialect) -> Optional[uuid.UUID]:
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        return uuid.UUID(bytes=bytes(value))
+
+
+# 74 random bits per UUIDv7: 12 in rand_a and 62 in rand_b
+_UUID7_RAND_BITS = 74
+_UUID7_RAND_B_MASK = (1 << 62) - 1
+# Millisecond and random bits of the last UUIDv7, shared by all threads
+_uuid7_lock = threading.Lock()
+_uuid7_last_ms = 0
+_uuid7_last_rand = 0
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Generate a time-ordered UUID (RFC 9562 version 7).
+
+    The leading 48 bits are a millisecond timestamp, so new keys land at the
+    right edge of the primary key index instead of at random pages. Within
+    one millisecond, or if the clock steps back, the random bits of the
+    previous UUID are incremented instead (RFC 9562 section 6.2, method 2),
+    so every UUID sorts after the one generated before it.
+    """
+    global _uuid7_last_ms, _uuid7_last_rand
+
+    timestamp_ms = time.time_ns() // 1_000_000
+    with _uuid7_lock:
+        if timestamp_ms > _uuid7_last_ms:
+            rand = int.from_bytes(os.urandom(10), "big") >> (80 - _UUID7_RAND_BITS)
+        else:
+            timestamp_ms = _uuid7_last_ms
+            rand = _uuid7_last_rand + 1
+            if rand >> _UUID7_RAND_BITS:
+                # Counter overflow: borrow the next millisecond
+                timestamp_ms += 1
+                rand = 0
+        _uuid7_last_ms = timestamp_ms
+        _uuid7_last_rand = rand
+
+    # Layout: unix_ts_ms(48) | ver(4)=0b0111 | rand_a(12) | var(2)=0b10 | rand_b(62)
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76
+    value |= (rand >> 62) << 64
+    value |= 0x2 << 62
+    value |= rand & _UUID7_RAND_B_MASK
+    return uuid.UUID(int=value)
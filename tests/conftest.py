@@ -4,31 +4,48 @@ Reference: https://fastapi.tiangolo.com/tutorial/testing/
 """
 
 import pytest
-import asyncio
+import functools
 from typing import AsyncGenerator
-from httpx import AsyncClient
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+
+import bcrypt
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine, AsyncSession
+from sqlalchemy.pool import StaticPool
 from sqlmodel import SQLModel
 
 from app.main import app
 from app.shared.database import get_session
 from app.shared.config import settings
 
-# Test database URL
-TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+# Test database URL; in-memory, shared by all sessions through StaticPool
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def fast_password_hashing():
+    """
+    Hash passwords at bcrypt's minimum cost for the test run.
+    
+    Hashes stay real bcrypt hashes, so verification behaves as in
+    production, but each one takes about a millisecond.
+    
+    Single Responsibility: Test password hashing speed-up
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(bcrypt, "gensalt", functools.partial(bcrypt.gensalt, rounds=4))
+        yield
 
 
 @pytest.fixture(scope="session")
-def event_loop():
+def cached_test_password_hash(fast_password_hashing) -> str:
     """
-    Create an instance of the default event loop for the test session.
+    Hash of "testpassword", computed once per session.
     
-    Single Responsibility: Test event loop management
+    Single Responsibility: Shared test password hash
     """
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+    from app.auth.service import auth_service
+    return auth_service.get_password_hash("testpassword")
 
 
 @pytest.fixture(scope="session")
@@ -41,37 +58,84 @@ async def test_engine():
     engine = create_async_engine(
         TEST_DATABASE_URL,
         echo=False,
+        poolclass=StaticPool,
         connect_args={"check_same_thread": False}
     )
     
+    # Let SQLAlchemy emit BEGIN itself; the sqlite3 driver's implicit
+    # transaction handling breaks SAVEPOINT
+    @event.listens_for(engine.sync_engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+    
+    @event.listens_for(engine.sync_engine, "begin")
+    def do_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+    
     # Create tables
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
     
     yield engine
     
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
     await engine.dispose()
 
 
+@pytest.fixture(scope="session")
+async def test_connection(test_engine) -> AsyncGenerator[AsyncConnection, None]:
+    """
+    Open the one connection used by every test, inside a transaction that
+    is rolled back at the end of the session.
+    
+    Single Responsibility: Test connection management
+    """
+    async with test_engine.connect() as conn:
+        transaction = await conn.begin()
+        yield conn
+        await transaction.rollback()
+
+
+def _savepoint_session(conn: AsyncConnection) -> AsyncSession:
+    """Create a session whose commits release a SAVEPOINT on ``conn``."""
+    return AsyncSession(
+        bind=conn,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint"
+    )
+
+
 @pytest.fixture
-async def test_session(test_engine) -> AsyncGenerator[AsyncSession, None]:
+async def test_session(test_connection) -> AsyncGenerator[AsyncSession, None]:
     """
     Create test database session.
     
+    Each test runs inside a SAVEPOINT that is rolled back afterwards, so
+    rows written by one test are not seen by the next.
+    
     Single Responsibility: Test session creation
     """
-    async_session = sessionmaker(
-        test_engine,
-        class_=AsyncSession,
-        expire_on_commit=False
-    )
+    nested = await test_connection.begin_nested()
     
-    async with async_session() as session:
+    async with _savepoint_session(test_connection) as session:
         yield session
+    
+    await nested.rollback()
+
+
+@pytest.fixture(scope="session")
+def transport() -> ASGITransport:
+    """
+    Create the ASGI transport shared by all test clients.
+    
+    Single Responsibility: Test transport creation
+    """
+    return ASGITransport(app=app, raise_app_exceptions=True)
 
 
 @pytest.fixture
-async def client(test_session) -> AsyncGenerator[AsyncClient, None]:
+async def client(test_session, transport) -> AsyncGenerator[AsyncClient, None]:
     """
     Create test HTTP client.
     
@@ -82,38 +146,59 @@ async def client(test_session) -> AsyncGenerator[AsyncClient, None]:
     
     app.dependency_overrides[get_session] = override_get_session
     
-    async with AsyncClient(app=app, base_url="http://test") as client:
+    async with AsyncClient(
+        transport=transport, base_url="http://test", follow_redirects=False
+    ) as client:
         yield client
     
     app.dependency_overrides.clear()
 
 
-@pytest.fixture
-async def authenticated_client(client, test_session):
+@pytest.fixture(scope="session")
+async def test_user(test_connection, cached_test_password_hash):
     """
-    Create authenticated test client.
+    Create the test user once for the whole session.
     
-    Single Responsibility: Authenticated client creation
+    Single Responsibility: Shared test user creation
     """
-    from app.auth.service import auth_service
     from app.auth.models import User
     
-    # Create test user
     test_user = User(
         username="testuser",
         email="test@example.com",
         full_name="Test User",
-        hashed_password=auth_service.get_password_hash("testpassword")
+        hashed_password=cached_test_password_hash
     )
     
-    test_session.add(test_user)
-    await test_session.commit()
-    await test_session.refresh(test_user)
+    async with _savepoint_session(test_connection) as session:
+        session.add(test_user)
+        await session.commit()
+        await session.refresh(test_user)
+    
+    return test_user
+
+
+@pytest.fixture
+async def authenticated_client(
+    client, transport, test_user
+) -> AsyncGenerator[AsyncClient, None]:
+    """
+    Create authenticated test client.
+    
+    Uses its own client on the shared transport, so the plain ``client``
+    fixture is left without an Authorization header.
+    
+    Single Responsibility: Authenticated client creation
+    """
+    from app.auth.service import auth_service
     
     # Create token
     token = auth_service.create_access_token(data={"sub": test_user.username})
     
-    # Set authorization header
-    client.headers["Authorization"] = f"Bearer {token}"
-    
-    return client
+    async with AsyncClient(
+        transport=transport,
+        base_url="http://test",
+        follow_redirects=False,
+        headers={"Authorization": f"Bearer {token}"}
+    ) as authenticated_client:
+        yield authenticated_client
@@ -88,3 +88,177 @@ class TestAuthentication:
         data = response.json()
         assert data["username"] == "testuser"
         assert data["email"] == "test@example.com"
+    
+    async def test_get_current_user_inactive(
+        self, client: AsyncClient, test_session, cached_test_password_hash
+    ):
+        """Test that inactive users are rejected by the auth dependency."""
+        from app.auth.service import auth_service
+        from app.auth.models import User
+        
+        inactive_user = User(
+            username="inactiveuser",
+            email="inactive@example.com",
+            full_name="Inactive User",
+            hashed_password=cached_test_password_hash,
+            is_active=False
+        )
+        test_session.add(inactive_user)
+        await test_session.commit()
+        
+        token = auth_service.create_access_token(data={"sub": "inactiveuser"})
+        response = await client.get(
+            "/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"}
+        )
+        
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Inactive user"
+    
+    async def test_invalidate_user_drops_cached_principal(
+        self, client: AsyncClient, test_session, cached_test_password_hash
+    ):
+        """Test that a user change is seen once the cached principal is dropped."""
+        from app.auth.service import auth_service
+        from app.auth.models import User
+        
+        user = User(
+            username="changinguser",
+            email="changing@example.com",
+            full_name="Changing User",
+            hashed_password=cached_test_password_hash
+        )
+        test_session.add(user)
+        await test_session.commit()
+        
+        token = auth_service.create_access_token(data={"sub": "changinguser"})
+        headers = {"Authorization": f"Bearer {token}"}
+        try:
+            response = await client.get("/api/v1/auth/me", headers=headers)
+            assert response.status_code == 200
+            assert auth_service._principal_cache["changinguser"].is_active
+            
+            user.is_active = False
+            await test_session.commit()
+            auth_service.invalidate_user("changinguser")
+            assert "changinguser" not in auth_service._principal_cache
+            
+            response = await client.get("/api/v1/auth/me", headers=headers)
+            assert response.status_code == 400
+            assert response.json()["detail"] == "Inactive user"
+        finally:
+            auth_service.invalidate_user("changinguser")
+    
+    async def test_create_user_drops_cached_principal(self, test_session):
+        """Test that creating a user replaces any principal cached under its name."""
+        from app.auth.service import auth_service
+        from app.auth.models import UserPrincipal
+        from app.auth.schemas import UserCreate
+        
+        stale = UserPrincipal(None, "recreateduser", False, False)
+        auth_service._principal_cache["recreateduser"] = stale
+        try:
+            user = await auth_service.create_user(test_session, UserCreate(
+                username="recreateduser",
+                email="recreated@example.com",
+                full_name="Recreated User",
+                password="password123"
+            ))
+            principal = await auth_service.get_auth_projection(
+                test_session, "recreateduser"
+            )
+            assert principal.id == user.id
+            assert principal.is_active
+        finally:
+            auth_service.invalidate_user("recreateduser")
+
+
+class TestTokenVerification:
+    """
+    Test suite for JWT verification and the verified-token cache.
+    
+    Single Responsibility: Token verification testing
+    """
+    
+    def test_token_round_trip(self):
+        """Test that a created token verifies to its subject."""
+        from app.auth.service import auth_service
+        
+        token = auth_service.create_access_token(data={"sub": "roundtrip"})
+        
+        assert auth_service.verify_token(token).username == "roundtrip"
+        # The second call is served from the cache
+        assert auth_service.verify_token(token).username == "roundtrip"
+    
+    def test_tampered_token_rejected(self):
+        """Test that editing any part of a cached token's JWT is rejected."""
+        import base64
+        import orjson
+        from app.auth.service import auth_service
+        
+        token = auth_service.create_access_token(data={"sub": "victim"})
+        assert auth_service.verify_token(token) is not None
+        
+        header, payload, signature = token.split(".")
+        forged_payload = base64.urlsafe_b64encode(
+            orjson.dumps({"sub": "admin", "exp": 4102444800})
+        ).rstrip(b"=").decode()
+        flipped = "A" if signature[0] != "A" else "B"
+        
+        assert auth_service.verify_token(
+            f"{header}.{forged_payload}.{signature}"
+        ) is None
+        assert auth_service.verify_token(
+            f"{header}.{payload}.{flipped}{signature[1:]}"
+        ) is None
+    
+    def test_token_signed_with_other_key_rejected(self):
+        """Test that tokens are checked against the configured key only."""
+        import jwt
+        from app.auth.service import auth_service
+        from app.shared.config import settings
+        
+        token = jwt.encode(
+            {"sub": "outsider", "exp": 4102444800},
+            settings.secret_key + "-other",
+            algorithm=settings.algorithm,
+        )
+        
+        assert auth_service.verify_token(token) is None
+    
+    def test_token_without_subject_rejected(self):
+        """Test that the required claims are enforced."""
+        from app.auth.service import auth_service
+        
+        token = auth_service.create_access_token(data={"role": "user"})
+        
+        assert auth_service.verify_token(token) is None
+    
+    def test_expired_token_rejected(self):
+        """Test that expired tokens fail verification."""
+        from datetime import timedelta
+        from app.auth.service import auth_service
+        
+        token = auth_service.create_access_token(
+            data={"sub": "expired"}, expires_delta=timedelta(seconds=-1)
+        )
+        
+        assert auth_service.verify_token(token) is None
+    
+    def test_cached_token_not_served_past_expiry(self):
+        """Test that a cached token near its expiry is verified again."""
+        import hashlib
+        import time
+        from datetime import timedelta
+        from app.auth.schemas import TokenData
+        from app.auth.service import auth_service
+        
+        token = auth_service.create_access_token(
+            data={"sub": "expiring"}, expires_delta=timedelta(seconds=-1)
+        )
+        # Simulate an entry cached while the token was still valid
+        cache_key = hashlib.sha256(token.encode()).digest()
+        auth_service._token_cache[cache_key] = (
+            TokenData(username="expiring"), time.time() + 1
+        )
+        
+        assert auth_service.verify_token(token) is None
@@ -0,0 +1,42 @@
+"""
+Cache manager tests
+"""
+
+from app.shared.cache import CacheManager
+
+
+class TestCacheManager:
+    """
+    Test suite for the Redis connection lifecycle.
+
+    Single Responsibility: Cache connection testing
+    """
+
+    async def test_disconnect_closes_client_and_pool(self, monkeypatch):
+        """Test that shutdown closes the explicitly created connection pool."""
+        cache = CacheManager("redis://localhost:6379/0")
+        await cache.connect()
+        closed = []
+
+        async def close_client():
+            closed.append("client")
+
+        async def close_pool():
+            closed.append("pool")
+
+        monkeypatch.setattr(cache._redis, "aclose", close_client)
+        monkeypatch.setattr(cache._pool, "aclose", close_pool)
+
+        await cache.disconnect()
+
+        assert closed == ["client", "pool"]
+        assert cache._redis is None
+        assert cache._pool is None
+
+    async def test_disconnect_without_connect(self):
+        """Test that disconnecting an unused manager is a no-op."""
+        cache = CacheManager("redis://localhost:6379/0")
+
+        await cache.disconnect()
+
+        assert cache._pool is None
@@ -0,0 +1,226 @@
+"""
+Text cleaning and chunking tests
+"""
+
+import random
+import re
+from typing import List
+
+import numpy as np
+import pytest
+
+from app.rag.chunking import DocumentProcessor, _last_position_before
+
+
+def _reference_clean_text(text: str) -> str:
+    """Text cleaning as implemented before the ASCII fast path."""
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s\.\,\!\?\:\;\-\(\)]', '', text)
+    return text.strip()
+
+
+def _reference_chunk_text(
+    text: str, chunk_size: int, chunk_overlap: int
+) -> List[str]:
+    """Chunking as implemented before the NumPy break point scan."""
+    if len(text) <= chunk_size:
+        return [text]
+
+    chunks = []
+    start = 0
+
+    while start < len(text):
+        end = start + chunk_size
+
+        if end >= len(text):
+            chunks.append(text[start:])
+            break
+
+        chunk_text = text[start:end]
+        last_sentence_end = max(
+            chunk_text.rfind('.'),
+            chunk_text.rfind('!'),
+            chunk_text.rfind('?')
+        )
+
+        if last_sentence_end > chunk_size // 2:
+            chunks.append(text[start:start + last_sentence_end + 1])
+            start = start + last_sentence_end + 1 - chunk_overlap
+        else:
+            last_space = chunk_text.rfind(' ')
+
+            if last_space > chunk_size // 2:
+                chunks.append(text[start:start + last_space])
+                start = start + last_space + 1 - chunk_overlap
+            else:
+                chunks.append(chunk_text)
+                start = end - chunk_overlap
+
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
+
+
+def _random_text(rng: random.Random, length: int, alphabet: str) -> str:
+    """Random text with words, spaces and sentence terminators mixed in."""
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+SAMPLE_TEXTS = [
+    "",
+    "   ",
+    "Short text.",
+    "Tabs\tand\nnewlines\r\n  collapse   into single spaces.",
+    "Symbols like @#$%^&* and <html> tags are removed; (parens), commas stay!",
+    "Café naïve résumé — “quoted” ‘text’ … ½ ¼ ™ © déjà vu.",
+    "日本語の文章です。句読点も含みます！ Ελληνικά κείμενα. Русский текст?",
+    "Emoji 😀 and astral 𝔘𝔫𝔦𝔠𝔬𝔡𝔢 characters.",
+    "Non-breaking\u00a0space, em\u2003space and line\u2028separator.",
+    "Zero\u200bwidth and combining e\u0301 marks, \x1c\x85 separators.",
+]
+
+
+class TestCleanText:
+    """
+    Test suite comparing text cleaning with the previous implementation.
+
+    Single Responsibility: Text cleaning testing
+    """
+
+    @pytest.mark.parametrize("text", SAMPLE_TEXTS)
+    def test_matches_reference(self, text: str):
+        """Cleaned text is identical to the regex-only implementation."""
+        processor = DocumentProcessor()
+        assert processor._clean_text(text) == _reference_clean_text(text)
+
+    def test_every_ascii_character(self):
+        """The ASCII fast path keeps and drops the same characters as the regex."""
+        processor = DocumentProcessor()
+        text = "".join(map(chr, range(128))) * 3
+        assert processor._clean_text(text) == _reference_clean_text(text)
+
+    def test_random_text_matches_reference(self):
+        """Random ASCII and non-ASCII text cleans the same as before."""
+        processor = DocumentProcessor()
+        rng = random.Random(0)
+        alphabets = [
+            "".join(map(chr, range(128))),
+            "abc déf ĝhï 日本 .!?\t\n  😀-(),;:",
+        ]
+        for alphabet in alphabets:
+            for _ in range(200):
+                text = _random_text(rng, rng.randint(0, 300), alphabet)
+                assert processor._clean_text(text) == _reference_clean_text(text)
+
+
+class TestChunkText:
+    """
+    Test suite comparing chunking with the previous implementation.
+
+    Single Responsibility: Text chunking testing
+    """
+
+    @pytest.mark.parametrize("text", SAMPLE_TEXTS)
+    def test_samples_match_reference(self, text: str):
+        """Sample texts chunk the same as before at a small chunk size."""
+        processor = DocumentProcessor(chunk_size=20, chunk_overlap=5)
+        assert processor._chunk_text(text) == _reference_chunk_text(text, 20, 5)
+
+    def test_shorter_than_one_chunk(self):
+        """Text that fits in one chunk is returned unchanged."""
+        processor = DocumentProcessor(chunk_size=500, chunk_overlap=50)
+        text = "A single short paragraph. Nothing to split here!"
+        assert processor._chunk_text(text) == [text]
+        assert _reference_chunk_text(text, 500, 50) == [text]
+
+    def test_exactly_one_chunk(self):
+        """Text exactly chunk_size long stays a single chunk."""
+        processor = DocumentProcessor(chunk_size=50, chunk_overlap=10)
+        text = "x" * 50
+        assert processor._chunk_text(text) == [text]
+
+    def test_no_sentence_terminator(self):
+        """Without terminators, chunks break on spaces as before."""
+        processor = DocumentProcessor(chunk_size=40, chunk_overlap=8)
+        text = " ".join(f"word{i}" for i in range(100))
+        chunks = processor._chunk_text(text)
+        assert chunks == _reference_chunk_text(text, 40, 8)
+        assert all("." not in chunk for chunk in chunks)
+
+    def test_no_break_points_forces_split(self):
+        """Without terminators or spaces, chunks are force-split with overlap."""
+        processor = DocumentProcessor(chunk_size=40, chunk_overlap=8)
+        text = "".join(chr(ord("a") + i % 26) for i in range(200))
+        chunks = processor._chunk_text(text)
+        assert chunks == _reference_chunk_text(text, 40, 8)
+        for previous, current in zip(chunks[:-1], chunks[1:], strict=True):
+            assert previous[-8:] == current[:8]
+
+    @pytest.mark.parametrize("offset", range(-3, 4))
+    def test_terminator_near_half_chunk(self, offset: int):
+        """Terminators just below, at and above chunk_size // 2 split as before."""
+        chunk_size, overlap = 40, 6
+        position = chunk_size // 2 + offset
+        text = "a" * position + "." + "b" * (chunk_size * 3)
+        processor = DocumentProcessor(chunk_size=chunk_size, chunk_overlap=overlap)
+        assert processor._chunk_text(text) == _reference_chunk_text(
+            text, chunk_size, overlap
+        )
+
+    @pytest.mark.parametrize("offset", range(-2, 3))
+    def test_terminator_at_chunk_end(self, offset: int):
+        """Terminators around the end of the window are found only inside it."""
+        chunk_size, overlap = 40, 6
+        position = chunk_size - 1 + offset
+        text = "a" * position + "!" + "b" * (chunk_size * 2)
+        processor = DocumentProcessor(chunk_size=chunk_size, chunk_overlap=overlap)
+        assert processor._chunk_text(text) == _reference_chunk_text(
+            text, chunk_size, overlap
+        )
+
+    def test_non_ascii_positions(self):
+        """Break points in text with astral and combining characters line up."""
+        processor = DocumentProcessor(chunk_size=30, chunk_overlap=7)
+        text = " ".join(["日本語😀 έλ. 𝔘𝔫𝔦 ok?"] * 20)
+        assert processor._chunk_text(text) == _reference_chunk_text(text, 30, 7)
+
+    def test_random_text_matches_reference(self):
+        """Random texts and chunk settings chunk the same as before."""
+        rng = random.Random(1)
+        alphabet = "abcdefgh    ..!?éü日😀"
+        for _ in range(300):
+            chunk_size = rng.randint(4, 80)
+            overlap = rng.randint(0, chunk_size // 2)
+            text = _random_text(rng, rng.randint(0, 600), alphabet)
+            processor = DocumentProcessor(chunk_size=chunk_size, chunk_overlap=overlap)
+            assert processor._chunk_text(text) == _reference_chunk_text(
+                text, chunk_size, overlap
+            )
+
+
+class TestLastPositionBefore:
+    """
+    Test suite for the sorted-position rfind replacement.
+
+    Single Responsibility: Break point lookup testing
+    """
+
+    def test_matches_rfind(self):
+        """Every window over a text gives the same offset as str.rfind."""
+        text = "ab.cd..e.f....gh.i"
+        positions = np.array([i for i, c in enumerate(text) if c == "."])
+        for start in range(len(text) + 1):
+            for end in range(start, len(text) + 2):
+                expected = text[start:end].rfind(".")
+                assert _last_position_before(positions, start, end) == expected
+
+    def test_empty_positions(self):
+        """No positions at all gives -1."""
+        positions = np.array([], dtype=np.intp)
+        assert _last_position_before(positions, 0, 10) == -1
+
+    def test_window_before_and_after_positions(self):
+        """Windows entirely before or after every position give -1."""
+        positions = np.array([10, 20, 30])
+        assert _last_position_before(positions, 0, 10) == -1
+        assert _last_position_before(positions, 31, 50) == -1
+        assert _last_position_before(positions, 10, 11) == 0
+        assert _last_position_before(positions, 11, 30) == 9
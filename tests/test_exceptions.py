@@ -0,0 +1,109 @@
+"""
+Error handler tests
+"""
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from httpx import ASGITransport, AsyncClient
+
+from app.shared.exceptions import (
+    BaseAppException,
+    NotFoundError,
+    _is_api_request,
+    app_exception_handler,
+    general_exception_handler,
+    http_exception_handler,
+)
+from app.shared.templates import create_templates
+
+
+@pytest.fixture
+async def error_client():
+    """
+    Create a client for an app whose routes raise each kind of error.
+
+    Single Responsibility: Error handler test client creation
+    """
+    app = FastAPI()
+    app.state.templates = create_templates()
+    app.add_exception_handler(BaseAppException, app_exception_handler)
+    app.add_exception_handler(HTTPException, http_exception_handler)
+    app.add_exception_handler(Exception, general_exception_handler)
+
+    for prefix in ("/api/v1", "/web"):
+        @app.get(f"{prefix}/app-error")
+        async def app_error():
+            raise NotFoundError("No such document")
+
+        @app.get(f"{prefix}/http-error")
+        async def http_error():
+            raise HTTPException(status_code=403, detail="Forbidden here")
+
+        @app.get(f"{prefix}/crash")
+        async def crash():
+            raise RuntimeError("boom")
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app, raise_app_exceptions=False),
+        base_url="http://test"
+    ) as client:
+        yield client
+
+
+def _request(scope_overrides: dict) -> Request:
+    """Build a bare request from an HTTP scope."""
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+    scope.update(scope_overrides)
+    return Request(scope)
+
+
+class TestErrorHandlers:
+    """
+    Test suite for API and web error responses.
+
+    Single Responsibility: Error handler testing
+    """
+
+    async def test_api_errors_are_json(self, error_client: AsyncClient):
+        """Test that errors under /api/ are returned as JSON."""
+        response = await error_client.get("/api/v1/app-error")
+        assert response.status_code == 404
+        assert response.json() == {
+            "detail": "No such document", "type": "NotFoundError"
+        }
+
+        response = await error_client.get("/api/v1/http-error")
+        assert response.status_code == 403
+        assert response.json() == {"detail": "Forbidden here"}
+
+    async def test_api_crash_hides_details(self, error_client: AsyncClient):
+        """Test that unexpected API errors do not leak the exception."""
+        response = await error_client.get("/api/v1/crash")
+
+        assert response.status_code == 500
+        assert response.json() == {"detail": "Internal server error"}
+
+    async def test_web_errors_render_error_page(self, error_client: AsyncClient):
+        """Test that errors outside /api/ render the HTML error page."""
+        response = await error_client.get("/web/app-error")
+        assert response.status_code == 404
+        assert response.headers["content-type"].startswith("text/html")
+        assert "No such document" in response.text
+
+        response = await error_client.get("/web/http-error")
+        assert response.status_code == 403
+        assert "Forbidden here" in response.text
+
+    def test_api_prefix_on_raw_path(self):
+        """Test that the raw path bytes decide whether a request is an API call."""
+        assert _is_api_request(_request({"path": "/api/x", "raw_path": b"/api/x"}))
+        assert not _is_api_request(_request({"path": "/apix", "raw_path": b"/apix"}))
+        assert not _is_api_request(_request({"path": "/api", "raw_path": b"/api"}))
+        assert not _is_api_request(
+            _request({"path": "/static/api/x", "raw_path": b"/static/api/x"})
+        )
+
+    def test_api_prefix_without_raw_path(self):
+        """Test the str path fallback for servers that omit raw_path."""
+        assert _is_api_request(_request({"path": "/api/x"}))
+        assert not _is_api_request(_request({"path": "/web/x"}))
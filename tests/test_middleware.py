@@ -0,0 +1,209 @@
+"""
+Middleware tests
+"""
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from itsdangerous.exc import BadSignature, SignatureExpired
+
+from app.shared.middleware import (
+    RequestPipelineMiddleware,
+    _Blake2bTimestampSigner,
+    _ClientRateLimiter,
+)
+
+
+def _pipeline_app(**kwargs) -> RequestPipelineMiddleware:
+    """Wrap a one-route app in the request pipeline."""
+    app = FastAPI()
+
+    @app.get("/api/ping")
+    async def ping():
+        return {"pong": True}
+
+    return RequestPipelineMiddleware(app, **kwargs)
+
+
+class TestRateLimiting:
+    """
+    Test suite for rate limiting in the request pipeline.
+
+    Single Responsibility: Rate limit testing
+    """
+
+    async def test_limit_exceeded_returns_429_with_retry_after(self):
+        """Test that a client over its budget gets a 429 with Retry-After."""
+        app = _pipeline_app(calls=2, period=60, environment="production")
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app, client=("203.0.113.7", 1234)),
+            base_url="http://test"
+        ) as client:
+            assert (await client.get("/api/ping")).status_code == 200
+            assert (await client.get("/api/ping")).status_code == 200
+            response = await client.get("/api/ping")
+
+        assert response.status_code == 429
+        assert response.json() == {"detail": "Rate limit exceeded"}
+        assert response.headers["retry-after"] == "30"
+        assert response.headers["content-length"] == str(len(response.content))
+        # Denied responses go through the same header pipeline
+        assert response.headers["x-frame-options"] == "DENY"
+        assert "content-security-policy" in response.headers
+        assert "x-process-time" in response.headers
+
+    async def test_clients_have_separate_budgets(self):
+        """Test that one client's requests do not use up another's."""
+        app = _pipeline_app(calls=1, period=60)
+
+        for host in ("198.51.100.1", "198.51.100.2"):
+            async with AsyncClient(
+                transport=ASGITransport(app=app, client=(host, 1234)),
+                base_url="http://test"
+            ) as client:
+                assert (await client.get("/api/ping")).status_code == 200
+                assert (await client.get("/api/ping")).status_code == 429
+
+    async def test_no_limit_without_calls(self):
+        """Test that the limiter is off when no call budget is configured."""
+        app = _pipeline_app(calls=None)
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            for _ in range(5):
+                response = await client.get("/api/ping")
+                assert response.status_code == 200
+                assert response.headers["x-content-type-options"] == "nosniff"
+
+    def test_tokens_refill_over_time(self, monkeypatch):
+        """Test that a denied client is allowed again after Retry-After."""
+        import app.shared.middleware as middleware
+
+        now = [1000.0]
+        monkeypatch.setattr(middleware.time, "monotonic", lambda: now[0])
+        limiter = _ClientRateLimiter(calls=2, period=60)
+        scope = {"client": ("203.0.113.9", 1234)}
+
+        assert limiter.allow(scope)
+        assert limiter.allow(scope)
+        assert not limiter.allow(scope)
+
+        now[0] += float(limiter.retry_after)
+        assert limiter.allow(scope)
+        assert not limiter.allow(scope)
+
+    def test_idle_buckets_swept_one_shard_at_a_time(self, monkeypatch):
+        """Test that idle buckets are dropped within one period of sweeps."""
+        import app.shared.middleware as middleware
+
+        now = [1000.0]
+        monkeypatch.setattr(middleware.time, "monotonic", lambda: now[0])
+        limiter = _ClientRateLimiter(calls=10, period=64)
+        for i in range(256):
+            limiter.allow({"client": (f"10.0.{i}.1", 1234)})
+
+        now[0] += 65
+        for _ in range(limiter.SHARD_COUNT):
+            # Each call sweeps at most one shard
+            limiter.allow({"client": ("192.0.2.1", 1234)})
+            now[0] += limiter._gc_interval
+
+        tracked = [key for shard in limiter.shards for key in shard]
+        assert tracked == [_ClientRateLimiter._client_key(
+            {"client": ("192.0.2.1", 1234)}
+        )]
+
+
+class TestClientKey:
+    """
+    Test suite for rate limit client keys.
+
+    Single Responsibility: Client identification testing
+    """
+
+    @staticmethod
+    def _key(host: str) -> int:
+        return _ClientRateLimiter._client_key({"client": (host, 1234)})
+
+    def test_ipv4(self):
+        """Test that IPv4 addresses map to their 32-bit value."""
+        assert self._key("192.0.2.1") == 0xC0000201
+
+    def test_ipv4_mapped_ipv6_counts_as_ipv4(self):
+        """Test that ::ffff:a.b.c.d shares the IPv4 client's bucket."""
+        assert self._key("::ffff:192.0.2.1") == self._key("192.0.2.1")
+
+    def test_ipv6_grouped_by_48_bit_prefix(self):
+        """Test that addresses in one IPv6 /48 share a bucket."""
+        assert self._key("2001:db8:1:2::1") == self._key("2001:db8:1:ffff::2")
+        assert self._key("2001:db8:1::1") != self._key("2001:db8:2::1")
+
+    def test_ipv6_never_collides_with_ipv4(self):
+        """Test that IPv6 keys are outside the IPv4 key range."""
+        assert self._key("::c000:201") != self._key("192.0.2.1")
+        assert self._key("::1") >= 1 << 32
+
+    def test_missing_and_non_ip_clients(self):
+        """Test that scopes without an IP address still get a key."""
+        assert _ClientRateLimiter._client_key({}) == -1
+        assert self._key("testclient") == self._key("testclient")
+
+
+class TestSessionSigner:
+    """
+    Test suite for the BLAKE2b session cookie signer.
+
+    Single Responsibility: Session signing testing
+    """
+
+    def test_round_trip(self):
+        """Test that a signed value unsigns to itself."""
+        signer = _Blake2bTimestampSigner("secret")
+        value = b"eyJ1c2VyIjogInRlc3QifQ=="
+
+        assert signer.unsign(signer.sign(value)) == value
+        assert signer.unsign(signer.sign(value), max_age=60) == value
+
+    def test_values_containing_separator(self):
+        """Test that values with dots survive the round trip."""
+        signer = _Blake2bTimestampSigner("secret")
+
+        assert signer.unsign(signer.sign(b"a.b.c")) == b"a.b.c"
+        assert signer.unsign(signer.sign(b"")) == b""
+
+    @pytest.mark.parametrize("tamper", [
+        lambda signed: b"X" + signed[1:],
+        lambda signed: signed[:-1] + (b"A" if signed[-1:] != b"A" else b"B"),
+        lambda signed: signed.replace(b".", b"", 1),
+        lambda signed: signed.rpartition(b".")[0],
+        lambda signed: b"",
+    ])
+    def test_tampered_value_rejected(self, tamper):
+        """Test that any edit to a signed value fails verification."""
+        signer = _Blake2bTimestampSigner("secret")
+        signed = signer.sign(b"payload")
+
+        with pytest.raises(BadSignature):
+            signer.unsign(tamper(signed))
+
+    def test_other_key_rejected(self):
+        """Test that values signed with another secret are rejected."""
+        signed = _Blake2bTimestampSigner("secret").sign(b"payload")
+
+        with pytest.raises(BadSignature):
+            _Blake2bTimestampSigner("other-secret").unsign(signed)
+
+    def test_expired_value_rejected(self, monkeypatch):
+        """Test that max_age is enforced from the signed timestamp."""
+        import app.shared.middleware as middleware
+
+        signer = _Blake2bTimestampSigner("secret")
+        signed = signer.sign(b"payload")
+        real_time = middleware.time.time
+        monkeypatch.setattr(middleware.time, "time", lambda: real_time() + 3601)
+
+        assert signer.unsign(signed) == b"payload"
+        with pytest.raises(SignatureExpired):
+            signer.unsign(signed, max_age=3600)
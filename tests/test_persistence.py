@@ -0,0 +1,247 @@
+"""
+Chat message persistence tests
+"""
+
+import asyncio
+import contextlib
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlmodel import select
+
+import app.chat.persistence as persistence
+from app.auth.models import ChatMessage
+from app.chat.persistence import MessageWriter
+from app.shared.types import uuid7
+
+
+class _RecordingWriter(MessageWriter):
+    """MessageWriter that records each batch instead of inserting it."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches: List[List[Dict[str, Any]]] = []
+
+    async def _write(self, rows: List[Dict[str, Any]]):
+        self.batches.append(rows)
+
+
+class _FlakySessionManager:
+    """Session manager whose first ``failures`` commits raise."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.attempts = 0
+        self.committed: List[Dict[str, Any]] = []
+
+    @contextlib.asynccontextmanager
+    async def session(self):
+        manager = self
+
+        class _Session:
+            async def execute(self, statement, rows):
+                self.rows = rows
+
+            async def commit(self):
+                manager.attempts += 1
+                if manager.attempts <= manager.failures:
+                    raise ConnectionError("database unavailable")
+                manager.committed.extend(self.rows)
+
+        yield _Session()
+
+
+class _ConnectionSessionManager:
+    """Session manager whose sessions commit to SAVEPOINTs on one connection."""
+
+    def __init__(self, connection: AsyncConnection):
+        self.connection = connection
+
+    @contextlib.asynccontextmanager
+    async def session(self):
+        async with AsyncSession(
+            bind=self.connection,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint"
+        ) as session:
+            yield session
+
+
+def _message_row(session_id: uuid.UUID, content: str) -> Dict[str, Any]:
+    """Build a row the way MessageWriter.enqueue does."""
+    return {
+        "id": uuid7(),
+        "session_id": session_id,
+        "content": content,
+        "is_user": True,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+@pytest.fixture
+def failure_log(monkeypatch) -> List[Dict[str, Any]]:
+    """
+    Capture persistence failures reported to the application logger.
+
+    Single Responsibility: Failure log capture
+    """
+    calls: List[Dict[str, Any]] = []
+    monkeypatch.setattr(
+        persistence.app_logger,
+        "log_persistence_failure",
+        lambda **kwargs: calls.append(kwargs),
+    )
+    return calls
+
+
+class TestMessageWriter:
+    """
+    Test suite for batched background message writes.
+
+    Single Responsibility: Message persistence testing
+    """
+
+    async def test_flush_on_batch_size(self):
+        """Test that a full batch is written without waiting for the interval."""
+        writer = _RecordingWriter(batch_size=3, flush_interval=10)
+        await writer.start()
+        session_id = uuid.uuid4()
+        try:
+            for i in range(7):
+                writer.enqueue(session_id, f"message {i}", is_user=True)
+            for _ in range(100):
+                if len(writer.batches) == 2:
+                    break
+                await asyncio.sleep(0.001)
+            assert [len(batch) for batch in writer.batches] == [3, 3]
+        finally:
+            await writer.stop()
+
+        # The partial batch is written on stop
+        assert [len(batch) for batch in writer.batches] == [3, 3, 1]
+        contents = [row["content"] for batch in writer.batches for row in batch]
+        assert contents == [f"message {i}" for i in range(7)]
+
+    async def test_flush_on_interval(self):
+        """Test that a partial batch is written once the interval elapses."""
+        writer = _RecordingWriter(batch_size=100, flush_interval=0.05)
+        await writer.start()
+        session_id = uuid.uuid4()
+        try:
+            writer.enqueue(session_id, "hello", is_user=True)
+            writer.enqueue(session_id, "hi there", is_user=False)
+            await asyncio.sleep(0.01)
+            assert writer.batches == []
+
+            await asyncio.sleep(0.1)
+            assert len(writer.batches) == 1
+            assert [row["is_user"] for row in writer.batches[0]] == [True, False]
+        finally:
+            await writer.stop()
+
+    async def test_rows_keep_enqueue_order(self):
+        """Test that ids and timestamps follow the order messages were queued."""
+        writer = _RecordingWriter(batch_size=1000, flush_interval=10)
+        await writer.start()
+        session_id = uuid.uuid4()
+        for i in range(500):
+            writer.enqueue(session_id, str(i), is_user=i % 2 == 0)
+        await writer.stop()
+
+        rows = writer.batches[0]
+        assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+        assert [row["created_at"] for row in rows] == sorted(
+            row["created_at"] for row in rows
+        )
+
+    async def test_enqueue_before_start_is_ignored(self):
+        """Test that messages queued while the writer is stopped are dropped."""
+        writer = _RecordingWriter()
+        writer.enqueue(uuid.uuid4(), "too early", is_user=True)
+        await writer.start()
+        await writer.stop()
+
+        assert writer.batches == []
+
+    async def test_failed_batch_is_retried(self, monkeypatch, failure_log):
+        """Test that a failed insert is retried and then written once."""
+        manager = _FlakySessionManager(failures=2)
+        monkeypatch.setattr(persistence, "sessionmanager", manager)
+        writer = MessageWriter(max_attempts=3, retry_backoff=0.001)
+
+        rows = [{"content": "kept"}]
+        await writer._write(rows)
+
+        assert manager.attempts == 3
+        assert manager.committed == rows
+        assert [call["attempt"] for call in failure_log] == [1, 2]
+        assert not any(call["dropped"] for call in failure_log)
+
+    async def test_batch_dropped_after_max_attempts(self, monkeypatch, failure_log):
+        """Test that a batch is given up on, and reported, after max_attempts."""
+        manager = _FlakySessionManager(failures=10)
+        monkeypatch.setattr(persistence, "sessionmanager", manager)
+        writer = MessageWriter(max_attempts=3, retry_backoff=0.001)
+
+        await writer._write([{"content": "lost"}, {"content": "also lost"}])
+
+        assert manager.attempts == 3
+        assert manager.committed == []
+        assert [call["dropped"] for call in failure_log] == [False, False, True]
+        assert failure_log[-1]["rows"] == 2
+        assert failure_log[-1]["error"] == "database unavailable"
+
+    async def test_constraint_violation_drops_only_bad_rows(
+        self, monkeypatch, failure_log, test_session, test_connection
+    ):
+        """Test that one rejected row does not take the rest of the batch down."""
+        monkeypatch.setattr(
+            persistence, "sessionmanager", _ConnectionSessionManager(test_connection)
+        )
+        session_id = uuid.uuid4()
+        existing = _message_row(session_id, "already stored")
+        await MessageWriter()._write([existing])
+
+        # The duplicate primary key fails the batch insert as a whole
+        batch = [
+            _message_row(session_id, "first"),
+            dict(existing, content="duplicate"),
+            _message_row(session_id, "second"),
+        ]
+        writer = MessageWriter(max_attempts=3, retry_backoff=10)
+        await writer._write(batch)
+
+        result = await test_session.execute(
+            select(ChatMessage.content)
+            .where(ChatMessage.session_id == session_id)
+            .order_by(ChatMessage.id)
+        )
+        assert result.scalars().all() == ["already stored", "first", "second"]
+        assert len(failure_log) == 1
+        assert failure_log[0]["rows"] == 1
+        assert failure_log[0]["dropped"]
+
+    async def test_constraint_violation_is_not_retried(
+        self, monkeypatch, failure_log
+    ):
+        """Test that an IntegrityError skips the backoff loop."""
+        inserted: List[List[Dict[str, Any]]] = []
+
+        async def insert(rows):
+            inserted.append(rows)
+            if any(row["content"] == "bad" for row in rows):
+                raise IntegrityError("INSERT", {}, Exception("constraint failed"))
+
+        writer = MessageWriter(max_attempts=5, retry_backoff=10)
+        monkeypatch.setattr(writer, "_insert", insert)
+        rows = [{"content": "good"}, {"content": "bad"}, {"content": "fine"}]
+
+        await writer._write(rows)
+
+        assert inserted == [rows, rows[:1], rows[1:2], rows[2:]]
+        assert [call["rows"] for call in failure_log] == [1]
+        assert "constraint failed" in failure_log[0]["error"]
@@ -0,0 +1,90 @@
+"""
+Shared column type and id generation tests
+"""
+
+import threading
+import time
+import uuid
+
+import app.shared.types as types
+from app.shared.types import uuid7
+
+
+class TestUUID7:
+    """
+    Test suite for time-ordered UUID generation.
+
+    Single Responsibility: UUIDv7 testing
+    """
+
+    def test_version_and_variant(self):
+        """Test that generated UUIDs carry the v7 version and RFC variant."""
+        value = uuid7()
+
+        assert value.version == 7
+        assert value.variant == uuid.RFC_4122
+
+    def test_timestamp_prefix(self):
+        """Test that the leading 48 bits are the current Unix time in ms."""
+        before = time.time_ns() // 1_000_000
+        value = uuid7()
+        after = time.time_ns() // 1_000_000
+
+        assert before <= value.int >> 80 <= after
+
+    def test_monotonic_within_one_millisecond(self):
+        """Test that UUIDs generated in a tight loop strictly increase."""
+        values = [uuid7() for _ in range(10_000)]
+
+        assert all(a < b for a, b in zip(values[:-1], values[1:], strict=True))
+        # Many of them share a millisecond, so ordering comes from the counter
+        assert len({value.int >> 80 for value in values}) < len(values)
+
+    def test_monotonic_when_clock_steps_back(self, monkeypatch):
+        """Test that a clock moving backwards does not reorder UUIDs."""
+        first = uuid7()
+        now_ns = (first.int >> 80) * 1_000_000
+        monkeypatch.setattr(types.time, "time_ns", lambda: now_ns - 5_000_000)
+
+        second = uuid7()
+        third = uuid7()
+
+        assert first < second < third
+        assert second.version == third.version == 7
+
+    def test_counter_overflow_moves_to_next_millisecond(self, monkeypatch):
+        """Test that an exhausted counter borrows the next millisecond."""
+        first = uuid7()
+        frozen_ns = (first.int >> 80) * 1_000_000
+        monkeypatch.setattr(types.time, "time_ns", lambda: frozen_ns)
+        monkeypatch.setattr(
+            types, "_uuid7_last_rand", (1 << types._UUID7_RAND_BITS) - 1
+        )
+
+        second = uuid7()
+
+        assert second > first
+        assert second.int >> 80 == (first.int >> 80) + 1
+        assert second.version == 7
+        assert second.variant == uuid.RFC_4122
+
+    def test_unique_and_ordered_across_threads(self):
+        """Test that concurrent threads never get the same or reordered UUIDs."""
+        results = [[] for _ in range(8)]
+
+        def generate(out):
+            for _ in range(2_000):
+                out.append(uuid7())
+
+        threads = [
+            threading.Thread(target=generate, args=(out,)) for out in results
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        all_values = [value for out in results for value in out]
+        assert len(set(all_values)) == len(all_values)
+        for out in results:
+            assert out == sorted(out)
@@ -0,0 +1,158 @@
+"""
+Chat WebSocket tests
+"""
+
+import contextlib
+import uuid
+from typing import Dict, Optional
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from starlette.datastructures import Headers, QueryParams
+
+import app.chat.websocket as chat_websocket
+from app.auth.models import ChatSession, User
+from app.auth.service import auth_service
+from app.chat.websocket import _authorized_chat_session_id
+
+
+class _Handshake:
+    """The parts of a WebSocket the ownership check reads."""
+
+    def __init__(
+        self, headers: Optional[Dict[str, str]] = None, query: str = ""
+    ):
+        self.headers = Headers(headers or {})
+        self.query_params = QueryParams(query)
+
+
+class _ConnectionSessionManager:
+    """Session manager whose sessions run on the test connection."""
+
+    def __init__(self, connection: AsyncConnection):
+        self.connection = connection
+
+    @contextlib.asynccontextmanager
+    async def session(self):
+        async with AsyncSession(
+            bind=self.connection,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint"
+        ) as session:
+            yield session
+
+
+@pytest.fixture
+async def chat_owner(
+    monkeypatch, test_session, test_connection, cached_test_password_hash
+):
+    """
+    Create a user who owns one chat session.
+
+    Single Responsibility: Chat session owner creation
+    """
+    monkeypatch.setattr(
+        chat_websocket, "sessionmanager", _ConnectionSessionManager(test_connection)
+    )
+    owner = User(
+        username="roomowner",
+        email="roomowner@example.com",
+        full_name="Room Owner",
+        hashed_password=cached_test_password_hash
+    )
+    test_session.add(owner)
+    await test_session.commit()
+    chat_session = ChatSession(title="Owned", user_id=owner.id)
+    test_session.add(chat_session)
+    await test_session.commit()
+
+    yield owner, chat_session
+
+    auth_service.invalidate_user(owner.username)
+
+
+def _bearer(username: str) -> Dict[str, str]:
+    token = auth_service.create_access_token(data={"sub": username})
+    return {"authorization": f"Bearer {token}"}
+
+
+class TestChatSessionAuthorization:
+    """
+    Test suite for binding WebSocket rooms to owned chat sessions.
+
+    Single Responsibility: WebSocket persistence authorization testing
+    """
+
+    async def test_owner_with_header_token(self, chat_owner):
+        """Test that the owner's socket persists into their chat session."""
+        owner, chat_session = chat_owner
+        websocket = _Handshake(headers=_bearer(owner.username))
+
+        assert await _authorized_chat_session_id(
+            websocket, str(chat_session.id)
+        ) == chat_session.id
+
+    async def test_owner_with_query_token(self, chat_owner):
+        """Test that browsers can send the token as a query parameter."""
+        owner, chat_session = chat_owner
+        token = auth_service.create_access_token(data={"sub": owner.username})
+        websocket = _Handshake(query=f"token={token}")
+
+        assert await _authorized_chat_session_id(
+            websocket, str(chat_session.id)
+        ) == chat_session.id
+
+    async def test_other_user_cannot_write_into_session(
+        self, chat_owner, test_session, cached_test_password_hash
+    ):
+        """Test that another authenticated user's socket persists nothing."""
+        _, chat_session = chat_owner
+        intruder = User(
+            username="intruder",
+            email="intruder@example.com",
+            full_name="Intruder",
+            hashed_password=cached_test_password_hash
+        )
+        test_session.add(intruder)
+        await test_session.commit()
+
+        try:
+            websocket = _Handshake(headers=_bearer("intruder"))
+            assert await _authorized_chat_session_id(
+                websocket, str(chat_session.id)
+            ) is None
+        finally:
+            auth_service.invalidate_user("intruder")
+
+    async def test_unauthenticated_socket_persists_nothing(self, chat_owner):
+        """Test that a guessed session id without a token is not bound."""
+        _, chat_session = chat_owner
+
+        assert await _authorized_chat_session_id(
+            _Handshake(), str(chat_session.id)
+        ) is None
+        assert await _authorized_chat_session_id(
+            _Handshake(headers={"authorization": "Bearer not-a-jwt"}),
+            str(chat_session.id)
+        ) is None
+
+    async def test_inactive_owner_persists_nothing(self, chat_owner, test_session):
+        """Test that a deactivated owner's token no longer binds the session."""
+        owner, chat_session = chat_owner
+        owner.is_active = False
+        await test_session.commit()
+        auth_service.invalidate_user(owner.username)
+
+        assert await _authorized_chat_session_id(
+            _Handshake(headers=_bearer(owner.username)), str(chat_session.id)
+        ) is None
+
+    async def test_unknown_session_and_plain_rooms(self, chat_owner):
+        """Test that rooms not naming an existing session are not bound."""
+        owner, _ = chat_owner
+        websocket = _Handshake(headers=_bearer(owner.username))
+
+        assert await _authorized_chat_session_id(websocket, "general") is None
+        assert await _authorized_chat_session_id(
+            websocket, str(uuid.uuid4())
+        ) is None